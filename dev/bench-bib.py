@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+"""
+Benchmark the bib file parser and writer on a synthetic bibliography.
+
+Reports entries/s, MB/s and peak memory for BibFile.cites() (eager and
+lazy), BibFile.iterCites(), Cite.pretty() and BibFile.setCites(). Results
+are written as JSON, pass a previous result file with --compare to see the
+relative change per benchmark. The on-disk cache and the user config are
+not touched, a temporary config is used instead.
+
+Usage
+=====
+
+```
+./dev/bench-bib.py -n 20000 -o new.json --compare old.json
+```
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from paperman import cfg
+from paperman import parser
+
+import bibcorpus
+import benchutils
+
+
+def _config():
+  return {
+    'cache': {'enabled': False},
+    'bib_repair': {
+      'verify_url_exists': False,
+      'verify_doi_exists': False,
+      'convert_journal_to_iso4_abbr': False,
+      'convert_journal_to_full_name': False,
+    },
+    'z_bib_words_protect_capitalization': bibcorpus.PROTECTED,
+    'z_bib_words_dont_protect_capitalization': [],
+  }
+
+
+def _parseEager(path):
+  return parser.BibFile(path).cites()
+
+
+def _parseLazy(path):
+  return parser.BibFile(path, lazy=True).cites()
+
+
+def _iterate(path):
+  return sum([1 for _ in parser.BibFile(path).iterCites()])
+
+
+def _pretty(path):
+  return [c.pretty() for c in parser.BibFile(path).cites()]
+
+
+def _setCites(path):
+  bib = parser.BibFile(path)
+  bib.setCites(bib.cites())
+
+
+def _setCitesOneChanged(path):
+  bib = parser.BibFile(path)
+  cites = bib.cites()
+  cites[len(cites)//2]['note'] = 'changed note'
+  bib.setCites(cites)
+
+
+BENCHMARKS = [
+  ('cites', _parseEager, False),
+  ('cites_lazy', _parseLazy, False),
+  ('iterCites', _iterate, False),
+  ('pretty', _pretty, False),
+  # setCites modifies the file, it is restored from the original content
+  ('setCites', _setCites, True),
+  ('setCites_unchanged', _setCites, False),
+  ('setCites_one_changed', _setCitesOneChanged, True),
+]
+
+
+def _run(func, path, content, restore, measureMemory):
+  if restore:
+    with open(path, 'w') as f:
+      f.write(content)
+  if measureMemory:
+    tracemalloc.start()
+  t0 = time.perf_counter()
+  func(path)
+  dt = time.perf_counter()-t0
+  peak = None
+  if measureMemory:
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+  return dt, peak
+
+
+def _check(path):
+  state = lambda cites: [(c.key, c.section, c.fields, c.fieldsParseInfo)
+                             for c in cites]
+  reference = state(parser.BibFile(path).citesReference())
+  for name, cites in [('cites', parser.BibFile(path).cites()),
+                      ('cites_lazy', parser.BibFile(path, lazy=True).cites()),
+                      ('iterCites', parser.BibFile(path).iterCites())]:
+    if state(cites) != reference:
+      raise RuntimeError(f'{name} differs from reference parser')
+  print('results match reference parser')
+
+
+def main():
+  p = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+  p.add_argument('-n', '--entries', type=int, default=20000,
+                 help='number of entries in synthetic bibliography')
+  p.add_argument('-a', '--abstract-words', type=int, default=60,
+                 help='scale of the length of generated abstracts')
+  p.add_argument('-r', '--repeat', type=int, default=3,
+                 help='number of timed runs per benchmark, best is reported')
+  p.add_argument('-s', '--seed', type=int, default=0,
+                 help='seed of the corpus generator')
+  p.add_argument('-o', '--output', default='bench-bib.json',
+                 help='file to write json results to')
+  p.add_argument('-c', '--compare',
+                 help='json results of a previous run to compare against')
+  p.add_argument('--check', action='store_true',
+                 help='verify that cites() and iterCites() give the same '
+                      'results as the reference parser before benchmarking')
+  p.add_argument('benchmarks', nargs='*',
+                 help='names of benchmarks to run, defaults to all')
+  args = p.parse_args()
+
+  with tempfile.TemporaryDirectory() as d:
+    # json is valid yaml and can be used as config file
+    cfg._CFG_PATH = os.path.join(d, 'paperman.conf')
+    with open(cfg._CFG_PATH, 'w') as f:
+      json.dump(_config(), f)
+
+    path = os.path.join(d, 'bench.bib')
+    content = bibcorpus.generate(args.entries, seed=args.seed,
+                                 abstractWords=args.abstract_words)
+    with open(path, 'w') as f:
+      f.write(content)
+    size = os.path.getsize(path)
+    entries = len(parser.BibFile(path).cites())
+    print(f'{entries} entries, {size/1024**2:.1f} MB')
+    if args.check:
+      _check(path)
+
+    results = {}
+    for name, func, restore in BENCHMARKS:
+      if args.benchmarks and name not in args.benchmarks:
+        continue
+      dt = min([_run(func, path, content, restore, False)[0]
+                    for _ in range(args.repeat)])
+      _, peak = _run(func, path, content, restore, True)
+      results[name] = dict(seconds=dt,
+                           entries_per_second=entries/dt,
+                           mb_per_second=size/1024**2/dt,
+                           peak_memory_mb=peak/1024**2)
+      print(f'{name:22s} {dt:8.3f} s {entries/dt:10.0f} entries/s '
+            f'{size/1024**2/dt:8.2f} MB/s {peak/1024**2:8.1f} MB peak')
+
+  benchutils.writeReport(args.output, results,
+                         entries=entries,
+                         bytes=size,
+                         seed=args.seed)
+
+  if args.compare:
+    def memory(old, new):
+      return f'{new["peak_memory_mb"]-old["peak_memory_mb"]:+8.1f} MB peak'
+    benchutils.compare(args.compare, results, describe=['entries'],
+                       label=lambda name: f'{name:22s}', extra=memory)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""
+Measure the memory footprint of parsed citations.
+
+Generates a synthetic bib file, parses it with paperman.parser.BibFile and
+reports the memory retained per citation, both for fully parsed and lazily
+parsed citations. The on-disk cache and the user config are not touched,
+an empty temporary config is used instead.
+
+Usage
+=====
+
+```
+./dev/bench-cite-memory.py [number of entries]
+```
+"""
+
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from paperman import cfg
+from paperman import parser
+
+import bibcorpus
+
+
+def measure(path, lazy):
+  tracemalloc.start()
+  bib = parser.BibFile(path, lazy=lazy)
+  cites = bib.cites()
+  bib._content = None
+  current, _ = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  return current/len(cites)
+
+
+def main():
+  n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+  with tempfile.TemporaryDirectory() as d:
+    cfg._CFG_PATH = os.path.join(d, 'paperman.conf')
+    with open(cfg._CFG_PATH, 'w') as f:
+      f.write('cache:\n  enabled: false\n')
+
+    path = os.path.join(d, 'bench.bib')
+    with open(path, 'w') as f:
+      f.write(bibcorpus.generate(n))
+    print(f'{n} entries, {os.path.getsize(path)/1024**2:.1f} MB')
+    print(f'eager: {measure(path, False):8.0f} bytes per entry')
+    print(f'lazy:  {measure(path, True):8.0f} bytes per entry')
+
+
+if __name__ == '__main__':
+  main()
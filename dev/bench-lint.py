@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+"""
+Benchmark the tex file linter on a synthetic document.
+
+Reports lines/s of TexFile.lint() on a generated document with avoid lists
+and writing conventions of realistic size. Results are written as JSON,
+pass a previous result file with --compare to see the relative change. The
+user config is not touched, a temporary config is used instead.
+
+Usage
+=====
+
+```
+./dev/bench-lint.py -n 10000 -o new.json --compare old.json
+```
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from paperman import cfg
+from paperman import parser
+
+import benchutils
+
+
+AVOID_COMMANDS = ['newline', 'linebreak', 'bf', 'it', 'rm', 'sc', 'tt', 'sl',
+                  'vspace', 'hspace', 'clearpage', 'pagebreak', 'noindent',
+                  'smallskip', 'medskip', 'bigskip', 'centerline', 'over',
+                  'eqnarray', 'def']
+
+
+def _vocabulary(rnd, n=2000):
+  letters = 'etaoinshrdlcumwfgypbvk'
+  return [''.join([rnd.choice(letters) for _ in range(rnd.randint(2, 9))])
+              for _ in range(n)]
+
+
+def _words(rnd, vocabulary, n):
+  return ' '.join([rnd.choice(vocabulary) for _ in range(n)])
+
+
+def _conventions(rnd, vocabulary, pairs, badWords):
+  lines = ['# writing conventions', '', 'correct | wrong', '--- | ---']
+  for w in rnd.sample(vocabulary, pairs):
+    lines.append(f'{w}-{w} | {w} {w}, {w}{w}')
+  lines += ['', '## bad words', '']
+  for w in rnd.sample(vocabulary, badWords):
+    lines.append(f'* {w}: too vague')
+  return '\n'.join(lines)+'\n'
+
+
+def _document(rnd, vocabulary, n):
+  # mix of prose, math, figures, labels and references typical for papers
+  lines = [r'\documentclass{article}', r'\begin{document}']
+  figure = 0
+  while len(lines) < n-1:
+    r = rnd.random()
+    if r < 0.05:
+      figure += 1
+      lines += [r'\begin{figure}',
+                r'  \includegraphics[width=\linewidth]{fig'+str(figure)+'}',
+                r'  \caption{'+_words(rnd, vocabulary, 8)+'}',
+                r'  \label{fig:'+str(figure)+'}',
+                r'\end{figure}']
+    elif r < 0.15:
+      lines.append(_words(rnd, vocabulary, 6)+r' ${a_'+str(figure)
+                   +r' = b}$ and $x+y$ '+_words(rnd, vocabulary, 4))
+    elif r < 0.25:
+      lines.append(_words(rnd, vocabulary, 8)+r', see Fig.~\ref{fig:'
+                   +str(rnd.randint(1, max(1, figure)))+'} '
+                   +_words(rnd, vocabulary, 4))
+    elif r < 0.30:
+      lines.append(r'\section{'+_words(rnd, vocabulary, 3)+'}')
+    else:
+      lines.append(_words(rnd, vocabulary, rnd.randint(8, 20))+'.')
+  lines.append(r'\end{document}')
+  return '\n'.join(lines)+'\n'
+
+
+def _config(d, rnd, vocabulary, args):
+  path = os.path.join(d, 'conventions.md')
+  with open(path, 'w') as f:
+    f.write(_conventions(rnd, vocabulary, args.conventions,
+                         args.conventions//5))
+  return {
+    'cache': {'enabled': False},
+    'lint': {
+      'avoid_commands': AVOID_COMMANDS,
+      'avoid_commands_in_toplevel': ['input', 'include'],
+      'avoid_words': rnd.sample(vocabulary, args.avoid_words),
+      'known_authors': [],
+      'writing_conventions_path': path,
+    },
+  }
+
+
+def _lint(path):
+  # a new TexFile per run, results of lint() are cached per instance
+  return list(parser.TexFile(path).lint(visited=set(), unusedLabels=set(),
+                                        brokenRefs=set()))
+
+
+def main():
+  p = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+  p.add_argument('-n', '--lines', type=int, default=10000,
+                 help='number of lines of synthetic document')
+  p.add_argument('-w', '--avoid-words', type=int, default=100,
+                 help='number of entries in lint.avoid_words')
+  p.add_argument('-c', '--conventions', type=int, default=100,
+                 help='number of correct/wrong pairs in writing conventions')
+  p.add_argument('-r', '--repeat', type=int, default=3,
+                 help='number of timed runs, best is reported')
+  p.add_argument('-s', '--seed', type=int, default=0,
+                 help='seed of the document generator')
+  p.add_argument('-o', '--output', default='bench-lint.json',
+                 help='file to write json results to')
+  p.add_argument('--compare',
+                 help='json results of a previous run to compare against')
+  args = p.parse_args()
+
+  rnd = random.Random(args.seed)
+  vocabulary = _vocabulary(rnd)
+  with tempfile.TemporaryDirectory() as d:
+    # json is valid yaml and can be used as config file
+    cfg._CFG_PATH = os.path.join(d, 'paperman.conf')
+    with open(cfg._CFG_PATH, 'w') as f:
+      json.dump(_config(d, rnd, vocabulary, args), f)
+
+    path = os.path.join(d, 'bench.tex')
+    with open(path, 'w') as f:
+      f.write(_document(rnd, vocabulary, args.lines))
+    size = os.path.getsize(path)
+
+    findings = len(_lint(path))
+    times = []
+    for _ in range(args.repeat):
+      t0 = time.perf_counter()
+      _lint(path)
+      times.append(time.perf_counter()-t0)
+    dt = min(times)
+    print(f'{args.lines} lines, {size/1024:.0f} kB, {findings} findings')
+    print(f'lint {dt:8.3f} s {args.lines/dt:10.0f} lines/s')
+
+  results = dict(lint=dict(seconds=dt, lines_per_second=args.lines/dt))
+  benchutils.writeReport(args.output, results,
+                         lines=args.lines,
+                         bytes=size,
+                         findings=findings,
+                         seed=args.seed)
+
+  if args.compare:
+    benchutils.compare(args.compare, results,
+                       describe=['lines', 'findings'])
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Benchmark project wide collection of labels, references and images.
+
+Generates synthetic projects of increasing size, with one section label,
+reference and image per item, images are spread over chapters, and reports
+the time Project needs to collect labels, references, included and unused
+images and bib files.
+Time per item should stay roughly constant with growing size. Results are
+written as JSON, pass a previous result file with --compare to see the
+relative change. The user config is not touched, a temporary config is used
+instead.
+
+Usage
+=====
+
+```
+./dev/bench-project.py -n 1000 4000 16000 -o new.json --compare old.json
+```
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from paperman import cfg
+from paperman import project
+
+import benchutils
+
+
+def _sections(n):
+  # labels and references are collected from toplevel files only
+  lines = []
+  for i in range(n):
+    lines += [r'\section{Section '+str(i)+r'}\label{sec:'+str(i)+'}',
+              r'As shown in Sec.~\ref{sec:'+str((i*7919) % n)+'}.']
+  return lines
+
+
+def _figures(items):
+  lines = []
+  for i in items:
+    lines += [r'\begin{figure}',
+              r'  \includegraphics{fig'+str(i)+'}',
+              r'  \label{fig:'+str(i)+'}',
+              r'\end{figure}']
+  return '\n'.join(lines)+'\n'
+
+
+def _project(d, n, chapters):
+  # every tenth image is not included anywhere
+  os.makedirs(os.path.join(d, 'img'))
+  for i in range(n+n//10):
+    open(os.path.join(d, 'img', f'fig{i}.png'), 'w').close()
+  os.makedirs(os.path.join(d, 'chapters'))
+  size = -(-n//chapters)
+  for c in range(chapters):
+    with open(os.path.join(d, 'chapters', f'c{c}.tex'), 'w') as f:
+      f.write(_figures(range(c*size, min(n, (c+1)*size))))
+  with open(os.path.join(d, 'main.tex'), 'w') as f:
+    f.write('\n'.join([r'\documentclass{article}',
+                       r'\graphicspath{{img/}}',
+                       r'\begin{document}']
+                      +_sections(n)
+                      +[r'\input{chapters/c'+str(c)+'}'
+                            for c in range(chapters)]
+                      +[r'\bibliography{refs}',
+                        r'\end{document}'])+'\n')
+  open(os.path.join(d, 'refs.bib'), 'w').close()
+
+
+def _collect(d):
+  # a new Project per run, results are cached per instance
+  cwd = os.getcwd()
+  os.chdir(d)
+  try:
+    p = project.Project(argparse.Namespace(tex_file=None))
+    res = (len(p.allLabels()), len(p.allRefs()), len(p.allIncludedImgs()),
+           len(p.unusedIncludedImgs()), len(p.allBibs()))
+  finally:
+    os.chdir(cwd)
+  return res
+
+
+def main():
+  p = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+  p.add_argument('-n', '--items', type=int, nargs='+',
+                 default=[1000, 2000, 4000, 8000],
+                 help='numbers of labels, references and images of the '
+                      'generated projects')
+  p.add_argument('-c', '--chapters', type=int, default=20,
+                 help='number of included chapter files')
+  p.add_argument('-r', '--repeat', type=int, default=3,
+                 help='number of timed runs, best is reported')
+  p.add_argument('-o', '--output', default='bench-project.json',
+                 help='file to write json results to')
+  p.add_argument('--compare',
+                 help='json results of a previous run to compare against')
+  args = p.parse_args()
+
+  results = {}
+  with tempfile.TemporaryDirectory() as d:
+    # json is valid yaml and can be used as config file
+    cfg._CFG_PATH = os.path.join(d, 'paperman.conf')
+    with open(cfg._CFG_PATH, 'w') as f:
+      json.dump({'cache': {'enabled': False}}, f)
+
+    for n in args.items:
+      projectDir = os.path.join(d, f'project-{n}')
+      _project(projectDir, n, args.chapters)
+      counts = _collect(projectDir)
+      times = []
+      for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        _collect(projectDir)
+        times.append(time.perf_counter()-t0)
+      dt = min(times)
+      print(f'{n:8d} items {dt:8.3f} s {dt/n*1e6:8.1f} us/item '
+            f'(labels, refs, imgs, unused imgs, bibs: {counts})')
+      results[str(n)] = dict(seconds=dt, counts=counts)
+
+  benchutils.writeReport(args.output, results, chapters=args.chapters)
+
+  if args.compare:
+    benchutils.compare(args.compare, results,
+                       label=lambda n: f'{n:>8s} items')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,53 @@
+"""
+Write and compare results of the benchmarks in this directory.
+
+Reports are JSON files that record paperman version, git revision and
+python version next to the results of each benchmark, results are compared
+by their "seconds" entries.
+"""
+
+import os
+import json
+import time
+import platform
+import subprocess
+
+import paperman
+
+
+def gitRevision():
+  try:
+    return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                          cwd=os.path.dirname(os.path.abspath(__file__)),
+                          capture_output=True, text=True).stdout.strip()
+  except Exception:
+    return None
+
+
+def writeReport(path, results, **info):
+  # info describes the benchmark input, e.g. its size or seed
+  report = dict(version=paperman.__version__,
+                revision=gitRevision(),
+                python=platform.python_version(),
+                **info,
+                timestamp=time.time(),
+                results=results)
+  with open(path, 'w') as f:
+    json.dump(report, f, indent=2)
+  print(f'wrote results to {path}')
+
+
+def compare(path, results, describe=(), label=str, extra=None):
+  # print speed relative to the report at path for all results found there,
+  # describe lists info of the old report to print, label(name) is printed
+  # in front of and extra(old, new) after the speed of each result
+  with open(path) as f:
+    old = json.load(f)
+  details = ', '.join([f'{old.get(k)} {k}' for k in describe])
+  print(f'compared to {old.get("revision")}'
+        +(f' ({details})' if details else '')+':')
+  for name, r in results.items():
+    if name in old['results']:
+      o = old['results'][name]
+      print(f'{label(name)} {o["seconds"]/r["seconds"]:6.2f}x speed'
+            +(f' {extra(o, r)}' if extra else ''))
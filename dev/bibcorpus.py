@@ -0,0 +1,58 @@
+"""
+Generate synthetic bibliographies for the benchmarks in this directory.
+
+The generated entries cover nested braces, quoted values, escaped braces,
+@comment sections and very long abstracts. Braces only ever protect whole
+words listed in PROTECTED, such that Cite.pretty() does not ask questions
+if these words are configured in z_bib_words_protect_capitalization.
+"""
+
+import random
+
+
+PROTECTED = ['Bayesian', 'Markov', 'Schrödinger', 'Monte', 'Carlo']
+WORDS = ['quantum', 'graph', 'neural', 'lattice', 'entropy', 'optical',
+         'topology', 'dynamics', 'spin', 'network', 'transport', 'phase']
+NAMES = ['Muster', 'Beispiel', 'Smith', 'Doe', 'Müller', 'Nguyen', 'Rossi',
+         'García', 'Kowalski', 'Tanaka']
+SECTIONS = ['article', 'Article', 'book', 'inproceedings', 'misc']
+
+
+def _sentence(rng, n):
+  return ' '.join([rng.choice(WORDS) for _ in range(n)])
+
+
+def entry(i, rng, abstractWords=60):
+  authors = ' and '.join([f'{rng.choice(NAMES)}, {rng.choice(NAMES)[0]}.'
+                              for _ in range(rng.randint(1, 6))])
+  title = (f'{{{rng.choice(PROTECTED)}}} {_sentence(rng, 3)} and '
+           f'{{{{{rng.choice(PROTECTED)}}} {rng.choice(WORDS)}}} '
+           f'{_sentence(rng, 2)}')
+  year = rng.randint(1950, 2025)
+  fields = [
+    ('author', f'{{{authors}}}'),
+    ('title', f'{{{title}}}'),
+    ('note', f'"quoted {{{rng.choice(PROTECTED)}}} note, with comma"'),
+    ('year', f'{year}'),
+    ('month', rng.choice(['jan', '{3}', '"Oct"'])),
+    ('volume', f'{{{rng.randint(1, 200)}}}'),
+    ('pages', f'{{{rng.randint(1, 500)}-{rng.randint(501, 999)}}}'),
+    ('doi', f'{{10.1000/{rng.choice(WORDS)}.{year}.{i}}}'),
+    ('howpublished', r'{escaped \{ braces \} and \"quotes\"}'),
+  ]
+  if rng.random() < 0.3:
+    fields.append(('abstract', f'{{{_sentence(rng, abstractWords*10)}, '
+                               f'{{nested {{{rng.choice(PROTECTED)}}}}} '
+                               f'{_sentence(rng, abstractWords)}}}'))
+  body = ',\n'.join([f'  {k} = {v}' for k, v in fields])
+  return f'@{rng.choice(SECTIONS)}{{key{i}_{rng.choice(WORDS)},\n{body}\n}}\n'
+
+
+def generate(n, seed=0, abstractWords=60):
+  rng = random.Random(seed)
+  res = ['% synthetic bibliography\n']
+  for i in range(n):
+    if rng.random() < 0.02:
+      res.append(f'@comment{{{_sentence(rng, 8)}}}\n')
+    res.append(entry(i, rng, abstractWords))
+  return '\n'.join(res)
@@ -134,6 +134,9 @@ def main():
                  help='print citation key instead of path')
   s.add_argument('-l', '--long', action='store_true',
                  help='print full bibtex entries instead of path only')
+  s.add_argument('-j', '--jobs', type=int, default=None,
+                 help='number of processes used to parse library bib files, '
+                      'defaults to the number of cpu cores')
   #s.add_argument('-L', '--extra-long', action='store_true',
   #               help='print full pdf2txt result instead of path only')
 
@@ -189,6 +192,14 @@ def main():
                      help='search latex project for potential errors')
   addVerboseArg(s)
   addTexFileArg(s)
+  s.add_argument('-c', '--changed-since', metavar='REV',
+                 help='only report findings on lines added or modified since '
+                      'git revision REV, unused labels and broken references '
+                      'are still reported for the whole project (requires '
+                      'git to be installed in your $PATH)')
+  s.add_argument('-j', '--jobs', type=int, default=None,
+                 help='number of processes used to check files, defaults to '
+                      'the number of cpu cores')
 
   # clean subcommand
   s = sub.add_parser('clean',
@@ -199,6 +210,16 @@ def main():
                       'more than one month')
   addVerboseArg(s)
 
+  # index subcommand
+  s = sub.add_parser('index',
+                     help='refresh index of files on img, input and bib '
+                          'search paths that is used to import missing files')
+  s.add_argument('-r', '--rebuild', action='store_true',
+                 help='discard index and rebuild it from scratch')
+  s.add_argument('-s', '--status', action='store_true',
+                 help='print number of indexed files per search path')
+  addVerboseArg(s)
+
   # config subcommand
   s = sub.add_parser('config',
                      help='print location of config file and exit')
@@ -219,7 +240,7 @@ def main():
     return
 
   # select submodule for subcommands
-  cmd, cmds = None, None
+  cmd = None
   if not args.command:
     io.err('subcommand is required')
     return
@@ -234,15 +255,12 @@ def main():
     from .subcommands import inp as cmd
 
   elif args.command == 'import-all':
-    from .subcommands import inp as cmd1
-    from .subcommands import img as cmd2
-    from .subcommands import bib as cmd3
+    from .subcommands import import_all as cmd
     setattr(args, 'import', True)
     args.clean = False
     args.rewrite = False
     args.sort = False
     args.print = False
-    cmds = [cmd1, cmd2, cmd3]
 
   elif args.command == 'sort-authors':
     from .subcommands import sort_authors as cmd
@@ -268,6 +286,9 @@ def main():
   elif args.command == 'clean':
     from .subcommands import clean as cmd
 
+  elif args.command == 'index':
+    from .subcommands import index as cmd
+
   elif args.command == 'config':
     from .subcommands import config as cmd
 
@@ -280,14 +301,9 @@ def main():
   cfg.testIfRequiredExist()
 
   # run subcommand module
-  cmdStr = str(cmd or '\n'+'\n'.join([str(c) for c in cmds]))
-  io.verb(f'selected subcommand(s): {cmdStr}')
+  io.verb(f'selected subcommand: {cmd}')
   try:
-    if cmd:
-      cmds = [cmd]
-    if cmds:
-      for cmd in cmds:
-        cmd.main(args)
+    cmd.main(args)
   except KeyboardInterrupt:
     raise
   except RuntimeError as e:
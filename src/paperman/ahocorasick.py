@@ -0,0 +1,60 @@
+import collections
+
+# multi-pattern string matching with the Aho-Corasick algorithm, all
+# occurrences of any number of literal patterns are found in a single pass
+# over the searched string
+
+
+class Automaton:
+  def __init__(self, patterns):
+    self.patterns = list(patterns)
+    self.lengths = [len(p) for p in self.patterns]
+
+    # trie of all patterns, out lists the patterns ending in each state
+    goto, out = [{}], [[]]
+    for k, p in enumerate(self.patterns):
+      if not p:
+        raise ValueError('patterns must not be empty')
+      s = 0
+      for c in p:
+        if c not in goto[s]:
+          goto[s][c] = len(goto)
+          goto.append({})
+          out.append([])
+        s = goto[s][c]
+      out[s].append(k)
+
+    # fail links point to the state of the longest proper suffix that is also
+    # in the trie, states are visited breadth first such that the fail links
+    # of parents are known
+    fail = [0]*len(goto)
+    queue = collections.deque(goto[0].values())
+    while queue:
+      s = queue.popleft()
+      for c, t in goto[s].items():
+        queue.append(t)
+        f = fail[s]
+        while f and c not in goto[f]:
+          f = fail[f]
+        fail[t] = goto[f].get(c, 0)
+        out[t] += out[fail[t]]
+
+    self._goto = goto
+    self._fail = fail
+    self._out = [tuple(o) for o in out]
+
+
+  def findall(self, s):
+    # return (start, index) of all occurrences of patterns in s, ordered by
+    # end of the occurrence
+    goto, fail, out, lengths = self._goto, self._fail, self._out, self.lengths
+    res = []
+    state = 0
+    for i, c in enumerate(s):
+      while state and c not in goto[state]:
+        state = fail[state]
+      state = goto[state].get(c, 0)
+      if out[state]:
+        for k in out[state]:
+          res.append((i+1-lengths[k], k))
+    return res
@@ -0,0 +1,117 @@
+import os
+import time
+import pickle
+import hashlib
+import tempfile
+import appdirs
+
+from . import io
+from . import cfg
+
+_CACHE_DIR           = appdirs.user_cache_dir('paperman')
+_HAS_PRUNED          = False
+
+# files that changed less than this many seconds ago are not cached, because
+# a modification within the same mtime tick would go unnoticed
+_MIN_AGE             = 2
+
+
+def _path(namespace, name):
+  return os.path.join(_CACHE_DIR, namespace,
+                      hashlib.sha1(name.encode()).hexdigest()+'.pickle')
+
+
+def fileKey(path, *extra):
+  # key that changes whenever the file at path is modified, returns None if
+  # the file was modified too recently to be cached safely
+  s = os.stat(path)
+  if time.time_ns()-s.st_mtime_ns < _MIN_AGE*1e9:
+    return None
+  return (os.path.realpath(path), s.st_size, s.st_mtime_ns, *extra)
+
+
+def load(namespace, name, key):
+  # return data stored for name if it was stored with identical key,
+  # return None otherwise
+  if not cfg.get('cache', 'enabled'):
+    return None
+  path = _path(namespace, name)
+  try:
+    with open(path, 'rb') as f:
+      storedKey, data = pickle.load(f)
+  except FileNotFoundError:
+    return None
+  except Exception as e:
+    io.dbg(f'removing unreadable cache file {path}: {e}')
+    remove(namespace, name)
+    return None
+  if storedKey != key:
+    return None
+
+  # update modification time to keep recently used files when pruning
+  try:
+    os.utime(path)
+  except OSError:
+    pass
+  return data
+
+
+def store(namespace, name, key, data):
+  if not cfg.get('cache', 'enabled'):
+    return
+  path = _path(namespace, name)
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+
+  # write to temporary file first and move to final location to never leave
+  # partially written cache files behind
+  fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+  try:
+    with os.fdopen(fd, 'wb') as f:
+      pickle.dump((key, data), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmpPath, path)
+  except Exception:
+    if os.path.exists(tmpPath):
+      os.remove(tmpPath)
+    raise
+  prune()
+
+
+def remove(namespace, name):
+  try:
+    os.remove(_path(namespace, name))
+  except OSError:
+    pass
+
+
+def prune():
+  # remove least recently used cache files until total size fits the
+  # configured limit, runs at most once per process
+  global _HAS_PRUNED
+  if _HAS_PRUNED:
+    return
+  _HAS_PRUNED = True
+
+  files = []
+  for root, dirs, _files in os.walk(_CACHE_DIR):
+    for f in _files:
+      # other files such as the search path index are not pruned
+      if not f.endswith(('.pickle', '.tmp')):
+        continue
+      try:
+        s = os.stat(os.path.join(root, f))
+      except OSError:
+        continue
+      files.append((s.st_mtime, s.st_size, os.path.join(root, f)))
+
+  size = sum([s for _, s, _ in files])
+  maxSize = cfg.get('cache', 'max_size_mb')*1024**2
+  for _, s, path in sorted(files):
+    if size <= maxSize:
+      break
+    io.dbg(f'pruning cache file {path}')
+    try:
+      os.remove(path)
+    except OSError:
+      pass
+    size -= s
+
@@ -12,6 +12,9 @@ except:
 _DEFAULT_CFG = dict(
   debug = False,
   max_directory_depth = 5,
+  walk_threads = 8,
+  search_exclude_patterns = ['node_modules/', '__pycache__/', 'venv/',
+                             'site-packages/', '*.egg-info/'],
   graphics_extensions = ['jpg', 'jpeg', 'pdf', 'png'],
   img_dir_name = 'img',
   img_search_paths = ['~/Documents'],
@@ -51,6 +54,14 @@ _DEFAULT_CFG = dict(
     known_authors=[],
     writing_conventions_path='',
   ),
+  cache=dict(
+    enabled = True,
+    max_size_mb = 256,
+  ),
+  index=dict(
+    enabled = True,
+    max_age_minutes = 10,
+  ),
   library_path = '~/Documents/bibliography',
   library_sync_additional_paths = [],
   library_collect_paths = ['~/Desktop', '~/Downloads'],
@@ -70,6 +81,9 @@ _CFG_PATH = os.path.join(appdirs.user_config_dir('paperman'), 'paperman.conf')
 _CFG = {}
 _IS_CFG_LOADED = False
 _HAS_TESTED_REQUIRED_KEYS = False
+# set in worker processes, which use the config of their parent process and
+# never write the config file, see useSnapshot()
+_IS_READ_ONLY = False
 
 
 def _touchCfg():
@@ -92,6 +106,8 @@ def _loadCfg():
 
 
 def _writeCfg():
+  if _IS_READ_ONLY:
+    return
   _touchCfg()
   with open(_CFG_PATH, 'w') as f:
     yaml.dump({k: v for k, v in {**_DEFAULT_CFG, **_CFG}.items()}, f)
@@ -101,6 +117,23 @@ def path():
   return os.path.abspath(_CFG_PATH)
 
 
+def snapshot():
+  # loaded config that can be passed to worker processes, see useSnapshot()
+  _loadCfg()
+  return _CFG_PATH, _CFG
+
+
+def useSnapshot(snapshot):
+  # use the config of the parent process in a worker process, workers never
+  # read or write the config file themselves, concurrent rewrites of the
+  # file by all workers could leave it truncated
+  global _CFG_PATH, _CFG, _IS_CFG_LOADED, _HAS_TESTED_REQUIRED_KEYS, _IS_READ_ONLY
+  _CFG_PATH, _CFG = snapshot
+  _IS_CFG_LOADED = True
+  _HAS_TESTED_REQUIRED_KEYS = True
+  _IS_READ_ONLY = True
+
+
 def reload():
   global _IS_CFG_LOADED
   try:
@@ -0,0 +1,160 @@
+import os
+import sqlite3
+
+from . import io
+from . import cfg
+from . import cache
+from . import parser
+
+# persistent index of citation keys in bib files on the search paths, bib
+# files are only parsed again if their size or modification time changed
+
+_SCHEMA_VERSION      = 1
+
+_db = None
+
+
+def _path():
+  return os.path.join(cache._CACHE_DIR, 'cites.sqlite')
+
+
+def _connect():
+  global _db
+  if _db is None:
+    os.makedirs(cache._CACHE_DIR, exist_ok=True)
+    db = sqlite3.connect(_path(), timeout=30)
+    if db.execute('PRAGMA user_version').fetchone()[0] != _SCHEMA_VERSION:
+      db.executescript('''
+        DROP TABLE IF EXISTS files;
+        DROP TABLE IF EXISTS cites;
+        CREATE TABLE files (path TEXT PRIMARY KEY, size INTEGER,
+                            mtime_ns INTEGER);
+        CREATE TABLE cites (key TEXT, path TEXT, start INTEGER,
+                            end INTEGER, line INTEGER);
+        CREATE INDEX cites_key ON cites (key);
+        CREATE INDEX cites_path ON cites (path);
+      ''')
+      db.execute(f'PRAGMA user_version = {_SCHEMA_VERSION}')
+      db.commit()
+    _db = db
+  return _db
+
+
+def _scan(path):
+  # return entries (key, start, end, line) of bib file, only the
+  # location of entries is recorded, fields are parsed on lookup, entries
+  # without location are recorded with start None, the first one wins for
+  # duplicate keys
+  try:
+    cites = parser.BibFile(path, lazy=True).index().values()
+  except RuntimeError as e:
+    io.warn('error parsing bibtex file on search path:', str(e), 'skipping...')
+    return []
+  return [(c.key,)+(c.span or (None, None, None)) for c in cites]
+
+
+class CiteIndex:
+  # citation keys of a fixed list of bib files, files are (path, priority)
+  # pairs, each entry is listed once per file it occurs in
+  def __init__(self, files):
+    self.priorities = {}
+    for path, priority in files:
+      self.priorities.setdefault(os.path.realpath(path), (priority, path))
+    self._bibs = {}
+    self._mem = None
+    self._db = None
+    if cfg.get('index', 'enabled'):
+      try:
+        self._db = _connect()
+        self._update()
+        return
+      except sqlite3.Error as e:
+        io.dbg(f'citation index unavailable, parsing bib files: {e}')
+        self._db = None
+
+    # without persistent index all files are scanned once per run
+    self._mem = {}
+    for realPath in self.priorities:
+      for e in _scan(realPath):
+        self._mem.setdefault(e[0], []).append((realPath,)+e[1:])
+
+
+  def _update(self):
+    # parse bib files that are new or changed since they were indexed
+    db = self._db
+    stored = {r[0]: r[1:] for r in db.execute('SELECT * FROM files')}
+    updated = 0
+    removed = []
+    for realPath in self.priorities:
+      try:
+        s = os.stat(realPath)
+      except OSError:
+        removed.append(realPath)
+        continue
+      if stored.get(realPath) == (s.st_size, s.st_mtime_ns):
+        continue
+      updated += 1
+      db.execute('DELETE FROM cites WHERE path = ?', (realPath,))
+      db.executemany('INSERT INTO cites VALUES (?, ?, ?, ?, ?)',
+                     [(e[0], realPath)+e[1:] for e in _scan(realPath)])
+
+      # files that change while being parsed are parsed again next time
+      if cache.fileKey(realPath) == (realPath, s.st_size, s.st_mtime_ns):
+        db.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?)',
+                   (realPath, s.st_size, s.st_mtime_ns))
+
+    # entries of bib files that were deleted or moved are removed, also if
+    # the files are not on the current search paths anymore
+    indexed = set(stored)|set([r[0] for r in
+                               db.execute('SELECT DISTINCT path FROM cites')])
+    removed += [p for p in indexed
+                    if p not in self.priorities and not os.path.exists(p)]
+    db.executemany('DELETE FROM cites WHERE path = ?', [(p,) for p in removed])
+    db.executemany('DELETE FROM files WHERE path = ?', [(p,) for p in removed])
+    db.commit()
+    io.dbg(f'updated citation index of {updated} of {len(self.priorities)} '
+           f'bib files, removed {len(removed)} missing bib files')
+
+
+  def entries(self, key):
+    # return (priority, path, entry) for all occurrences of key, the entry is
+    # passed to cite() to parse it
+    if self._db is not None:
+      rows = self._db.execute('SELECT path, start, end, line '
+                              'FROM cites WHERE key = ?', (key,)).fetchall()
+    else:
+      rows = self._mem.get(key, [])
+    res = []
+    for realPath, start, end, line in rows:
+      if realPath in self.priorities:
+        priority, path = self.priorities[realPath]
+        span = None if start is None else (start, end, line)
+        res.append((priority, path, (key, realPath, span)))
+    return res
+
+
+  def cite(self, entry):
+    # parse citation of an entry returned by entries(), raises RuntimeError
+    # if the file changed such that the entry cannot be found anymore
+    key, realPath, span = entry
+    if realPath not in self._bibs:
+      self._bibs[realPath] = parser.BibFile(realPath, lazy=True)
+    bib = self._bibs[realPath]
+    if span is None:
+      cite = bib.index().get(key)
+    else:
+      start, end, line = span
+      res = bib._parseAt(bib.content()[start:end], start, line)
+      cite = res[0] if len(res) == 1 else None
+    if cite is None or cite.key != key:
+      raise RuntimeError(f'citation {key} not found in {realPath}, '
+                         f'try "paperman index --rebuild"')
+    return cite
+
+
+def clear():
+  # remove all indexed citations
+  db = _connect()
+  db.execute('DELETE FROM cites')
+  db.execute('DELETE FROM files')
+  db.commit()
@@ -1,3 +1,4 @@
+import re
 import shutil
 import os
 import fnmatch
@@ -5,6 +6,9 @@ import fnmatch
 from . import io
 from . import cfg
 from . import parser
+from . import fsindex
+from . import ignore
+from . import citeindex
 
 
 def _candidateSortKey(rules):
@@ -15,26 +19,42 @@ def _candidateSortKey(rules):
       if 'path-order' in r:
         res += f'_{pathNo:04d}'
       elif 'newest' in r:
-        res += f'_{2**64-os.path.getmtime(path)}'
+        res += f'_{2**64-_mtime(path)}'
       elif 'oldest' in r:
-        res += f'_{os.path.getmtime(path)}'
+        res += f'_{_mtime(path)}'
       else:
         raise RuntimeError(f'unknown priority rule {r}')
     return res
   return key
 
 
-def _fastGlob(path):
-  # walk through filesystem sub tree described by path up to the first '*'
-  basePath = path.split('*')[0]
+# file indices and stat results are shared by all imports of a run
+_INDICES = {}
+_REFRESHED = set()
+_STATS = {}
 
-  # remove any inner '../' and './' from match path, as they dont make sense there
-  matchPath = path.replace('/../', '/').replace('/./', '/')
 
-  res = []
+def _stat(path):
+  # stat results are cached, None if file does not exist
+  if path not in _STATS:
+    try:
+      _STATS[path] = os.stat(path)
+    except OSError:
+      _STATS[path] = None
+  return _STATS[path]
+
+
+def _mtime(path):
+  return _stat(path).st_mtime
+
+
+def _walkFiles(basePath, refresh=False):
+  # walk through filesystem sub tree below basePath and yield all files that
+  # are not excluded by search_exclude_patterns or ignore files
   hasWarnedDepth = False
-  io.dbg(f'calling _fastGlob("{path}"), walking through "{basePath}"')
-  for root, dirs, files in os.walk(basePath, topdown=True):
+  rules = {basePath: ignore.IgnoreRules.fromConfig(basePath)}
+  io.dbg(f'walking through "{basePath}"')
+  for root, dirs, files in fsindex.walk(basePath, refresh=refresh):
     # abort tree is too deep
     if root.count(os.sep)-basePath.count(os.path.sep)-2 > cfg.get('max_directory_depth'):
       io.verb(f'skipping subfolders of {root}')
@@ -46,36 +66,86 @@ def _fastGlob(path):
                 f'levels')
       dirs.clear()
 
-    # do not recurse into links
-    while True:
-      i = [d for d in dirs if os.path.islink(d)]
-      if not i:
-        break
-      io.dbg(f'skipped link {i[0]}')
-      dirs.remove(i[0])
-
+    # apply ignore rules of parent directories and of this directory, links
+    # to directories are not recursed into by the walk
+    _rules = rules.pop(root)
+    if ignore.IGNORE_FILE in files:
+      _rules = _rules.extended(root)
 
-    # skip hidden directories (e.g. git)
-    while True:
-      i = [d for d in dirs if d.startswith('.')]
-      if not i:
-        break
-      #io.dbg(f'skipped hidden directory {i[0]}')
-      dirs.remove(i[0])
+    # skip hidden directories (e.g. git) and ignored directories
+    dirs[:] = [d for d in dirs if not d.startswith('.')
+                                  and not _rules.isIgnored(root, d, True)]
+    for d in dirs:
+      rules[os.path.join(root, d)] = _rules
 
-    # check if any file matches
     for f in files:
-      fname = os.path.join(root, f)
-      #io.dbg(f' checked filename {fname} for match with {matchPath}')
-      if fnmatch.fnmatch(fname, matchPath):
-        res.append(fname)
-  return res
+      if not _rules.isIgnored(root, f, False):
+        yield f, os.path.join(root, f)
+
+
+class _FileIndex:
+  # all files below a base path found in a single walk, files can be looked
+  # up by name, by stem (name up to any of its dots) or by suffix (name after
+  # its last dot), all lists are in walk order
+  def __init__(self, basePath, refresh=False):
+    self.files = []
+    self.byName = {}
+    self.byStem = {}
+    self.bySuffix = {}
+    for f, fname in _walkFiles(basePath, refresh=refresh):
+      self.files.append(fname)
+      self.byName.setdefault(f, []).append(fname)
+      parts = f.split('.')
+      for i in range(1, len(parts)):
+        self.byStem.setdefault('.'.join(parts[:i]), []).append(fname)
+      if len(parts) > 1:
+        self.bySuffix.setdefault(parts[-1], []).append(fname)
+
+
+  # return files that might match basename pattern, superset of all matches
+  def candidates(self, pattern):
+    isMagic = lambda s: any([c in s for c in '*?['])
+    if not isMagic(pattern):
+      return self.byName.get(pattern, [])
+    if pattern.endswith('.*') and not isMagic(pattern[:-2]):
+      return self.byStem.get(pattern[:-2], [])
+    if (pattern.startswith('*.') and not isMagic(pattern[2:])
+                                 and '.' not in pattern[2:]):
+      return self.bySuffix.get(pattern[2:], [])
+    return self.files
+
+
+def _index(basePath, refresh=False):
+  if refresh or basePath not in _INDICES:
+    _INDICES[basePath] = _FileIndex(basePath, refresh=refresh)
+    if refresh:
+      _REFRESHED.add(basePath)
+  return _INDICES[basePath]
 
 
-def importImgs(imgs, imgDir):
-  success, failed = [], []
+def _fastGlob(path):
+  # search filesystem sub tree described by path up to the first '*', which
+  # is walked once per run and indexed
+  basePath = path.split('*')[0]
 
-  # generate search paths
+  # remove any inner '../' and './' from match path, as they dont make sense there
+  matchPath = path.replace('/../', '/').replace('/./', '/')
+
+  # files listed in the persistent index might have been removed since, if
+  # nothing is found the index is refreshed once per run to find new files
+  io.dbg(f'calling _fastGlob("{path}"), searching index of "{basePath}"')
+  match = re.compile(fnmatch.translate(matchPath)).match
+  while True:
+    res = [fname for fname in _index(basePath).candidates(
+                                                os.path.basename(matchPath))
+                  if match(fname) and _stat(fname) is not None]
+    if (res or basePath in _REFRESHED or not cfg.get('index', 'enabled')
+            or not os.path.isdir(basePath)):
+      return res
+    _index(basePath, refresh=True)
+
+
+def _imgSearchPaths():
   searchPaths = []
   for p in cfg.get('img_search_paths'):
     # expand ~ in path
@@ -87,6 +157,56 @@ def importImgs(imgs, imgDir):
     # if no **-glob pattern detected, add standard one and add to list
     if '*' not in p:
       searchPaths.append(os.path.join(p, '**', cfg.get('img_dir_name')))
+  return searchPaths
+
+
+def _bibSearchPaths():
+  searchPaths = []
+  for p in (list(cfg.get('bib_search_paths'))
+            + ([cfg.get('library_path')+'/**'] if cfg.get('library_path') else [])):
+    # expand ~ in path
+    p = os.path.expanduser(p)
+
+    # append unedited path
+    searchPaths.append(p)
+  return searchPaths
+
+
+def _inputSearchPaths():
+  return [os.path.expanduser(p) for p in cfg.get('input_search_paths')]
+
+
+def searchBasePaths():
+  # return all directories that are walked when searching for files to import
+  patterns = ([os.path.join(p, 'name.*') for p in _imgSearchPaths()]
+              + [os.path.join(p, '*.'+ext) for p in _bibSearchPaths()
+                                    for ext in cfg.get('bibtex_extensions')]
+              + [os.path.join(p, 'name') for p in _inputSearchPaths()])
+  res = []
+  for p in patterns:
+    basePath = p.split('*')[0]
+    if basePath not in res and os.path.isdir(basePath):
+      res.append(basePath)
+  return res
+
+
+def refreshIndex(rebuild=False):
+  # update persistent index of all search paths and of citations in bib
+  # files found there, rebuild from scratch if requested
+  for basePath in searchBasePaths():
+    if rebuild:
+      fsindex.clear(basePath)
+    _index(basePath, refresh=True)
+  if rebuild:
+    citeindex.clear()
+  _citeIndex()
+
+
+def importImgs(imgs, imgDir):
+  success, failed = [], []
+
+  # generate search paths
+  searchPaths = _imgSearchPaths()
 
   # iterate through requested images and try to import
   for img in imgs:
@@ -116,64 +236,65 @@ def importImgs(imgs, imgDir):
     # copy best match to desired location
     os.makedirs(imgDir, exist_ok=True)
     shutil.copy(bestMatch, imgDir)
+    parser.img.forgetListing(imgDir)
     io.verb(f'copying {bestMatch} -> {imgDir}')
     success.append(img)
 
   return success, failed
 
 
-def importCites(cites):
-  success, failed = [], []
+def _citeIndex():
+  # all bib files on search paths with the index of their search path
+  files = []
+  for i, p in enumerate(_bibSearchPaths()):
+    for ext in cfg.get('bibtex_extensions'):
+      files.extend([(f, i) for f in _fastGlob(os.path.join(p, '*.'+ext))])
+  return citeindex.CiteIndex(files)
 
-  # generate search paths
-  searchPaths = []
-  for p in (list(cfg.get('bib_search_paths'))
-            + [cfg.get('library_path')+'/**'] if cfg.get('library_path') else []):
-    # expand ~ in path
-    p = os.path.expanduser(p)
 
-    # append unedited path
-    searchPaths.append(p)
+def importCites(cites):
+  success, failed = [], []
 
-  # create huge list with all found bib paths
-  allCites = []
-  for i, p in enumerate(searchPaths):
-    for ext in cfg.get('bibtex_extensions'):
-      for f in _fastGlob(os.path.join(p, '*.'+ext)):
-        try:
-          _cites = parser.BibFile(f).cites()
-        except RuntimeError as e:
-          io.warn('error parsing bibtex file on search path:',
-                  str(e),
-                  'skipping...')
-        else:
-          for c in _cites:
-            if c not in [c for _, _, c in allCites]:
-              allCites.append([i, f, c])
+  # index of citation keys in all bib files found on search paths
+  index = _citeIndex()
 
-  # iterate through requested images and try to import
+  # iterate through requested citations and try to import
+  rules = cfg.get('bib_search_priority').split()
+  merge = cfg.get('bib_repair', 'merge_all_found_info')
   for cite in cites:
-    candidates = [(i, f, c) for i, f, c in allCites if c == cite]
+    candidates = index.entries(cite.key)
+
+    # generate sorting function according to config, only the best match and
+    # the candidates merged into it are parsed
+    sortedCandidates = sorted(candidates, key=_candidateSortKey(rules))
+    io.dbg(f'first ten matching candidates sorted by {rules}:',
+           sortedCandidates[:10])
+    found = []
+    for _, path, entry in sortedCandidates:
+      try:
+        found.append((path, index.cite(entry)))
+      except RuntimeError as e:
+        io.warn('error parsing bibtex entry on search path:',
+                str(e),
+                'skipping...')
+        continue
+      if not merge:
+        break
 
     # in case no candidate was found, add cite to failed list and continue
-    if not candidates:
+    if not found:
       failed.append(cite)
       continue
 
-    # generate sorting function according to config
-    rules = cfg.get('bib_search_priority').split()
-    sortedCandidates = sorted(candidates, key=_candidateSortKey(rules))
-    io.dbg(f'first ten matching candidates sorted by {rules}:', sortedCandidates[:10])
-    _, _path, bestMatch = sortedCandidates[0]
+    _path, bestMatch = found[0]
     io.verb(f'best match for citation with key "{cite.key}"',
             f'found in file',
             f'{_path}')
 
-    if cfg.get('bib_repair', 'merge_all_found_info'):
-      if len(sortedCandidates) > 1:
-        io.verb('merging with info from all other candidates...')
-      for c in sortedCandidates[1:]:
-        bestMatch[-1].insertNonexistingItems(c[-1])
+    if len(found) > 1:
+      io.verb('merging with info from all other candidates...')
+    for _, c in found[1:]:
+      bestMatch.insertNonexistingItems(c)
 
     success.append(bestMatch)
 
@@ -185,7 +306,7 @@ def importInclude(include):
 
   if not os.path.exists(include):
     # generate search paths
-    searchPaths = [os.path.expanduser(p) for p in cfg.get('input_search_paths')]
+    searchPaths = _inputSearchPaths()
 
     # try to import
     candidates = []
@@ -0,0 +1,153 @@
+import os
+import time
+import sqlite3
+
+from . import io
+from . import cfg
+from . import cache
+from . import walker
+
+# persistent index of directory listings below search paths, directories
+# whose modification time did not change are not listed again
+
+# directories that changed less than this many seconds ago are not stored,
+# because a modification within the same mtime tick would go unnoticed
+_MIN_AGE             = 2
+_SCHEMA_VERSION      = 1
+
+_db = None
+
+
+def _path():
+  return os.path.join(cache._CACHE_DIR, 'index.sqlite')
+
+
+def _connect():
+  global _db
+  if _db is None:
+    os.makedirs(cache._CACHE_DIR, exist_ok=True)
+    db = sqlite3.connect(_path(), timeout=30)
+    if db.execute('PRAGMA user_version').fetchone()[0] != _SCHEMA_VERSION:
+      db.executescript('''
+        DROP TABLE IF EXISTS dirs;
+        DROP TABLE IF EXISTS bases;
+        CREATE TABLE dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER,
+                           dirs TEXT, links TEXT, files TEXT);
+        CREATE TABLE bases (path TEXT PRIMARY KEY, refreshed REAL);
+      ''')
+      db.execute(f'PRAGMA user_version = {_SCHEMA_VERSION}')
+      db.commit()
+    _db = db
+  return _db
+
+
+def _key(path):
+  return os.path.normpath(os.path.abspath(path))
+
+
+# names are joined by NUL characters, which cannot occur in file names
+def _pack(names):
+  return '\0'.join(names)
+
+
+def _unpack(s):
+  return s.split('\0') if s else []
+
+
+def _load(db, top):
+  # load all stored listings below top at once
+  key = _key(top)
+  prefix = key.rstrip(os.sep)+os.sep
+  rows = db.execute('SELECT path, mtime_ns, dirs, links, files FROM dirs '
+                    'WHERE path = ? OR (path >= ? AND path < ?)',
+                    (key, prefix, prefix[:-1]+chr(ord(os.sep)+1)))
+  return {r[0]: r[1:] for r in rows}
+
+
+def _isFresh(db, top):
+  maxAge = cfg.get('index', 'max_age_minutes')*60
+  r = db.execute('SELECT refreshed FROM bases WHERE path = ?',
+                 (_key(top),)).fetchone()
+  return r is not None and time.time()-r[0] < maxAge
+
+
+def walk(top, refresh=False):
+  # drop-in replacement for os.walk(top, topdown=True) that takes directory
+  # listings from the index, stored listings are trusted if top was checked
+  # within index.max_age_minutes and validated by directory mtime otherwise
+  # or if refresh is set
+  if not cfg.get('index', 'enabled'):
+    yield from walker.walk(top)
+    return
+  try:
+    db = _connect()
+    stored = _load(db, top)
+    trust = not refresh and _isFresh(db, top)
+  except sqlite3.Error as e:
+    io.dbg(f'search path index unavailable, walking {top}: {e}')
+    yield from walker.walk(top)
+    return
+
+  # called from walker threads, list.append is thread safe
+  updates = []
+  def listdir(root):
+    key = _key(root)
+    s = stored.get(key)
+    if s is not None and trust:
+      return [_unpack(_s) for _s in s[1:]]
+    mtime = os.stat(root).st_mtime_ns
+    if s is not None and s[0] == mtime:
+      return [_unpack(_s) for _s in s[1:]]
+    dirs, links, files = walker.listdir(root)
+    if time.time_ns()-mtime >= _MIN_AGE*1e9:
+      updates.append((key, mtime, _pack(dirs), _pack(links), _pack(files)))
+    return dirs, links, files
+
+  if not os.path.isdir(top):
+    return
+  complete = True
+  try:
+    yield from walker.walk(top, listdir=listdir)
+  except BaseException:
+    # includes GeneratorExit if the walk is not completed by the caller
+    complete = False
+    raise
+  finally:
+    _store(db, top, updates, complete and not trust)
+
+
+def _store(db, top, updates, refreshed):
+  try:
+    if updates:
+      db.executemany('INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?)',
+                     updates)
+    if refreshed:
+      db.execute('INSERT OR REPLACE INTO bases VALUES (?, ?)',
+                 (_key(top), time.time()))
+    db.commit()
+  except sqlite3.Error as e:
+    io.dbg(f'failed to update search path index: {e}')
+
+
+def clear(top):
+  # remove all stored listings below top
+  db = _connect()
+  key = _key(top)
+  prefix = key.rstrip(os.sep)+os.sep
+  db.execute('DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)',
+             (key, prefix, prefix[:-1]+chr(ord(os.sep)+1)))
+  db.execute('DELETE FROM bases WHERE path = ?', (key,))
+  db.commit()
+
+
+def status(top):
+  # return number of stored directories and files below top and the time
+  # of the last complete refresh
+  db = _connect()
+  dirs, files = 0, 0
+  for _, _, _, f in _load(db, top).values():
+    dirs += 1
+    files += len(_unpack(f))
+  r = db.execute('SELECT refreshed FROM bases WHERE path = ?',
+                 (_key(top),)).fetchone()
+  return dirs, files, (r[0] if r else None)
@@ -0,0 +1,108 @@
+import os
+import re
+
+from . import io
+from . import cfg
+
+# name of files that list additional patterns of files and directories to
+# ignore in their directory and below, syntax is similar to .gitignore
+IGNORE_FILE = '.papermanignore'
+
+
+def _translate(pattern):
+  # translate glob pattern to a regex, '*' and '?' do not match across
+  # directories, '**/' matches any number of directories including none and
+  # a trailing '/**' everything below
+  res = []
+  i, n = 0, len(pattern)
+  while i < n:
+    c = pattern[i]
+    if pattern.startswith('**', i) and (i == 0 or pattern[i-1] == '/'):
+      # other consecutive asterisks are treated like a single one
+      if pattern.startswith('**/', i):
+        res.append('(?:.*/)?')
+        i += 3
+        continue
+      if i+2 == n:
+        res.append('.*')
+        i += 2
+        continue
+    if c == '*':
+      res.append('[^/]*')
+    elif c == '?':
+      res.append('[^/]')
+    elif c == '[' and (j := pattern.find(']', i+2)) != -1:
+      # character class like [abc] or [!abc], ']' directly after the
+      # opening bracket is part of the class
+      cls = pattern[i+1:j]
+      if cls.startswith('!'):
+        cls = '^'+cls[1:]
+      res.append('['+cls.replace('\\', '\\\\')+']')
+      i = j
+    else:
+      res.append(re.escape(c))
+    i += 1
+  return '(?s:'+''.join(res)+r')\Z'
+
+
+def _compile(pattern):
+  # translate one .gitignore style pattern to (negate, dirOnly, anchored,
+  # regex), returns None for empty lines and comments
+  pattern = pattern.rstrip('\n').rstrip()
+  if not pattern or pattern.startswith('#'):
+    return None
+  negate = pattern.startswith('!')
+  if negate:
+    pattern = pattern[1:]
+  dirOnly = pattern.endswith('/')
+  pattern = pattern.rstrip('/')
+
+  # patterns containing a slash are relative to the directory they are
+  # defined for, others match names at any level
+  anchored = '/' in pattern
+  pattern = pattern.lstrip('/')
+  if not pattern:
+    return None
+  regex = _translate(pattern)
+  return negate, dirOnly, anchored, re.compile(regex).match
+
+
+class IgnoreRules:
+  def __init__(self, rules=()):
+    self.rules = list(rules)
+
+
+  def fromConfig(basePath):
+    # rules from search_exclude_patterns are relative to the search path
+    return IgnoreRules([(basePath, r) for r in
+                          [_compile(p) for p in cfg.get('search_exclude_patterns')]
+                        if r is not None])
+
+
+  def extended(self, path):
+    # return rules extended by the ignore file in directory path
+    fname = os.path.join(path, IGNORE_FILE)
+    try:
+      with open(fname, 'r') as f:
+        rules = [_compile(l) for l in f]
+    except OSError as e:
+      io.dbg(f'failed to read {fname}: {e}')
+      return self
+    return IgnoreRules(self.rules+[(path, r) for r in rules if r is not None])
+
+
+  def isIgnored(self, root, name, isDir):
+    # later rules override earlier ones like in .gitignore
+    res = False
+    for base, (negate, dirOnly, anchored, match) in self.rules:
+      if dirOnly and not isDir:
+        continue
+      if anchored:
+        subject = os.path.relpath(os.path.join(root, name), base)
+        if subject.startswith('..'):
+          continue
+      else:
+        subject = name
+      if match(subject.replace(os.sep, '/')):
+        res = not negate
+    return res
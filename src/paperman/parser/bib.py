@@ -1,18 +1,207 @@
 import os
 import re
+import sys
+import shutil
+import tempfile
+import concurrent.futures
 
 from .. import cfg
 from .. import io
 from .. import utils
+from .. import cache
 from . import common
 
 from .cite import Cite, FORBIDDEN_KEY_CHARS
 
 
+# increment whenever parsing results change to invalidate cached results
+_PARSER_VERSION = 2
+_LINT_VERSION = 1
+
+# number of characters read at once by BibFile.iterCites()
+_STREAM_CHUNK_SIZE = 1<<16
+
+# characters that end citation keys, item names and chunks of values
+_KEY_DELIMITERS = re.compile(r'[,}]')
+_ITEM_DELIMITERS = re.compile(r'[=}]')
+_VALUE_DELIMITERS = re.compile(r'[{}",\\]')
+_SKIP_DELIMITERS = re.compile(r'[{}"\\]')
+
+
+class _ReferenceFallback(Exception):
+  pass
+
+
+# same rules as applied characterwise by BibFile.citesReference(): no
+# forbidden characters and no space, newline or tab after the key started
+_VALID_KEY = re.compile(r'''[^\S ]*(?:[^\s#'",=(){}%~\\][^#'",=(){}%~\\ \n\t]*)?''')
+
+
+def _isValidItem(item, stripped=False):
+  # item names consist of letters, "-" and "_", whitespace is only allowed
+  # around the name unless the name is still incomplete
+  letters = ''.join(item.split())
+  if stripped and letters != item:
+    return False
+  letters = letters.replace('-', '').replace('_', '')
+  return letters == '' or letters.isalpha()
+
+
+def _scanValue(content, i):
+  # scan value starting at index i by jumping between delimiters, see
+  # BibFile.citesReference() for the rules, returns the value, its parse info,
+  # whether the section was closed and the index to continue scanning at
+  parts = []
+  length = 0
+  stripped = False
+  braceDepth = 0
+  quoteDepth = 0
+  opens, closes = [], []
+
+  # leading whitespace is dropped as soon as a brace or quote is recorded
+  def lstrip():
+    nonlocal parts, length, stripped
+    if not stripped:
+      v = ''.join(parts).lstrip()
+      parts, length, stripped = [v], len(v), True
+
+  while True:
+    m = _VALUE_DELIMITERS.search(content, i)
+    if not m:
+      raise _ReferenceFallback()
+    k = m.start()
+    if k > i:
+      parts.append(content[i:k])
+      length += k-i
+    c = content[k]
+    i = k+1
+
+    # backslash escapes the following character, escaped curly braces are
+    # still counted to guarantee matching
+    if c == '\\':
+      if i >= len(content):
+        raise _ReferenceFallback()
+      c = content[i]
+      i += 1
+      if c == '{':
+        braceDepth += 1
+      elif c == '}':
+        if braceDepth <= 0:
+          raise _ReferenceFallback()
+        braceDepth -= 1
+      parts.append('\\'+c)
+      length += 2
+
+    elif c == '{':
+      braceDepth += 1
+      lstrip()
+      opens.append(length)
+      parts.append(c)
+      length += 1
+
+    elif c == '}' and braceDepth == 0 and quoteDepth == 0:
+      return (*_flushValue(''.join(parts), opens, closes), True, i)
+
+    elif c == '}':
+      if braceDepth <= 0:
+        raise _ReferenceFallback()
+      braceDepth -= 1
+      lstrip()
+      closes.append(length)
+      parts.append(c)
+      length += 1
+
+    elif c == '"' and braceDepth == 0:
+      lstrip()
+      (closes if quoteDepth else opens).append(length)
+      quoteDepth = 1-quoteDepth
+      parts.append(c)
+      length += 1
+
+    elif c == ',' and braceDepth == 0 and quoteDepth == 0:
+      return (*_flushValue(''.join(parts), opens, closes), False, i)
+
+    else:
+      parts.append(c)
+      length += 1
+
+
+def _findSection(content, i):
+  # return start and end index of the next section that is not a comment,
+  # None if there is none, raises if the section is incomplete
+  while True:
+    i = content.find('@', i)
+    if i < 0:
+      return None
+    j = content.find('{', i+1)
+    if j < 0 or not content[i+1:j].strip().isalpha():
+      raise _ReferenceFallback()
+    if content[i+1:j].strip().lower() == 'comment':
+      i = j+1
+      continue
+    m = _KEY_DELIMITERS.search(content, j+1)
+    if not m:
+      raise _ReferenceFallback()
+    if m.group() == '}':
+      return i, m.end()
+    return i, _skipSection(content, m.end())
+
+
+def _skipSection(content, i):
+  # skip to the end of a section only counting braces and quotes, returns the
+  # index after the closing curly brace
+  braceDepth = 0
+  quoteDepth = 0
+  while True:
+    m = _SKIP_DELIMITERS.search(content, i)
+    if not m:
+      raise _ReferenceFallback()
+    c = m.group()
+    i = m.end()
+    if c == '\\':
+      if i >= len(content):
+        raise _ReferenceFallback()
+      if content[i] == '{':
+        braceDepth += 1
+      elif content[i] == '}':
+        if braceDepth <= 0:
+          raise _ReferenceFallback()
+        braceDepth -= 1
+      i += 1
+    elif c == '{':
+      braceDepth += 1
+    elif c == '}' and braceDepth == 0:
+      if quoteDepth:
+        raise _ReferenceFallback()
+      return i
+    elif c == '}':
+      braceDepth -= 1
+    elif braceDepth == 0:
+      quoteDepth = 1-quoteDepth
+
+
+def _flushValue(value, opens, closes):
+  # strip content between outermost braces/quotes and shift last closing
+  # index accordingly, identical to BibFile.citesReference()
+  if opens and closes:
+    _o, _c = opens[0], closes[-1]
+    midPart = value[_o+1:_c]
+    closes[-1] -= len(midPart) - len(midPart.strip())
+    value = (value[:_o+1] + midPart.strip() + value[_c:]).strip()
+  return value.strip(), (tuple(opens), tuple(closes))
+
+
+def _lintInProcess(path):
+  # entry point of worker processes of parallel lint, see prefetchLint()
+  return BibFile(path)._lintCached()
+
+
 class BibFile:
-  def __init__(self, fname):
+  def __init__(self, fname, lazy=False):
     self.fname = os.path.normpath(fname)
+    self.lazy = lazy
     self.path = None
+    self._lintFuture = None
     if self.exists():
       self.path = self.exists()
       self._exists = True
@@ -41,7 +230,249 @@ class BibFile:
 
   @utils.cacheReturnValue
   def cites(self):
+    # try to load previous parsing results from cache
+    key = None
+    if self.path:
+      key = cache.fileKey(self.path, _PARSER_VERSION)
+    if key:
+      res = self._citesFromCache(key)
+      if res is not None:
+        return res
+
+    # the chunked scanner bails out on anything unexpected, in which case the
+    # characterwise reference parser is run to produce the result or the
+    # line-numbered error message
+    try:
+      res = self._citesFast(lazy=self.lazy)
+    except _ReferenceFallback:
+      io.dbg(f'falling back to reference parser for bib file {self.path}')
+      res = self.citesReference()
+
+    # only store results if file did not change while parsing
+    if key and key == cache.fileKey(self.path, _PARSER_VERSION):
+      self._storeInCache(key, res)
+    return res
+
+
+  @utils.cacheReturnValue
+  def index(self):
+    # map citation keys to citations, the first one wins for duplicate keys
+    res = {}
+    for c in self.cites():
+      res.setdefault(c.key, c)
+    return res
+
+
+  def _citesFromCache(self, key):
+    entries = cache.load('bib', key[0], key)
+    if entries is None:
+      return None
+    io.dbg(f'loaded {len(entries)} cached citations of bib file {self.path}')
+    res = []
+    for citeKey, section, span, fields, fieldsParseInfo, isParsed in entries:
+      cite = Cite(citeKey, bibs=[self], section=section)
+      cite.span = span
+      if isParsed:
+        cite.fields, cite.fieldsParseInfo = fields, fieldsParseInfo
+      else:
+        cite._lazy = self
+      res.append(cite)
+
+    # parse remaining fields if cache was written in lazy mode but all
+    # fields are requested now
+    if not self.lazy and any([c._lazy for c in res]):
+      for c in res:
+        c.fields
+      self._storeInCache(key, res)
+    return res
+
+
+  def _storeInCache(self, key, cites):
+    entries = []
+    for c in cites:
+      if c._lazy:
+        entries.append((c.key, c.section, c.span, None, None, False))
+      else:
+        entries.append((c.key, c.section, c.span,
+                        c.fields, c.fieldsParseInfo, True))
+    cache.store('bib', key[0], key, entries)
+
+
+  def _citesFast(self, content=None, lazy=False):
+    if content is None:
+      content = self.content()
+    res = []
+    i = 0
+    line, lineCounted = 1, 0
+    while True:
+      # skip everything outside of sections
+      i = content.find('@', i)
+      if i < 0:
+        break
+      start = i
+
+      # section name extends up to the first opening curly brace
+      j = content.find('{', i+1)
+      if j < 0:
+        raise _ReferenceFallback()
+      section = content[i+1:j]
+      if not section.strip().isalpha():
+        raise _ReferenceFallback()
+      i = j+1
+      if section.strip().lower() == 'comment':
+        continue
+
+      # citation key extends up to the first comma or closing curly brace
+      m = _KEY_DELIMITERS.search(content, i)
+      if not m or not _VALID_KEY.fullmatch(content, i, m.start()):
+        raise _ReferenceFallback()
+      key = content[i:m.start()]
+      if m.group() == ',' and not key:
+        raise _ReferenceFallback()
+      cite = Cite(key, bibs=[self], section=section)
+      res.append(cite)
+      i = m.end()
+      line += content.count('\n', lineCounted, start)
+      lineCounted = start
+      if m.group() == '}':
+        cite.span = (start, i, line)
+        continue
+
+      # in lazy mode only record where the section is located, fields are
+      # parsed once they are accessed for the first time
+      if lazy:
+        i = _skipSection(content, i)
+        cite.span = (start, i, line)
+        cite._lazy = self
+        continue
+
+      # item names extend up to the next = sign, a closing curly brace
+      # means the section has ended
+      while True:
+        m = _ITEM_DELIMITERS.search(content, i)
+        if not m:
+          raise _ReferenceFallback()
+        item = content[i:m.start()]
+        if not _isValidItem(item):
+          raise _ReferenceFallback()
+        i = m.end()
+        if m.group() == '}':
+          if item.strip():
+            raise _ReferenceFallback()
+          break
+        item = sys.intern(item.strip())
+        if not item or not _isValidItem(item, stripped=True):
+          raise _ReferenceFallback()
+        value, parseInfo, sectionEnded, i = _scanValue(content, i)
+        if cite.fields is None:
+          cite.fields = {}
+        if cite.fieldsParseInfo is None:
+          cite.fieldsParseInfo = {}
+        if item in cite.fields:
+          raise _ReferenceFallback()
+        cite.fields[item] = value
+        cite.fieldsParseInfo[item] = parseInfo
+        if sectionEnded:
+          break
+      cite.span = (start, i, line)
+
+    return res
+
+
+  def iterCites(self):
+    # yield citations one by one while reading the file in chunks, such that
+    # memory usage is bounded by the largest section instead of the file size
+    if not self.path or getattr(self, '_cites', None) is not None:
+      yield from self.cites()
+      return
+
+    with open(self.path, 'r') as f:
+      buf = ''
+      i = 0
+      offset = 0
+      line, lineCounted = 1, 0
+      eof = False
+      readSize = _STREAM_CHUNK_SIZE
+      while True:
+        # find all complete sections in buffer
+        end = None
+        try:
+          while found := _findSection(buf, i if end is None else end):
+            end = found[1]
+        except _ReferenceFallback:
+          found = False
+
+        # parse complete sections at once and yield them
+        if end is not None:
+          line += buf.count('\n', lineCounted, i)
+          lineCounted = i
+          yield from self._parseAt(buf[i:end], offset+i, line)
+          i = end
+          readSize = _STREAM_CHUNK_SIZE
+          continue
+
+        # if file was read completely, either nothing is left or the rest is
+        # malformed and the reference parser produces the error
+        if eof:
+          if found is False:
+            # content() drops the newline at the end of the file
+            rest = buf[i:]
+            if rest.endswith('\n'):
+              rest = rest[:-1]
+            line += buf.count('\n', lineCounted, i)
+            yield from self.citesReference(rest, firstLine=line)
+          return
+
+        # drop consumed part of buffer and read next chunk, incomplete
+        # sections double the chunk size to keep retries cheap
+        if found is None:
+          i = len(buf)
+        line += buf.count('\n', lineCounted, i)
+        offset += i
+        buf = buf[i:]
+        i, lineCounted = 0, 0
+        chunk = f.read(readSize)
+        if found is False:
+          readSize *= 2
+        if chunk:
+          buf += chunk
+        else:
+          eof = True
+
+
+  def _parseSection(self, content, line):
+    try:
+      return self._citesFast(content)
+    except _ReferenceFallback:
+      return self.citesReference(content, firstLine=line)
+
+
+  def _parseAt(self, content, offset, line):
+    # parse part of the file starting at offset and line, spans of resulting
+    # citations refer to the whole file
+    res = self._parseSection(content, line)
+    for cite in res:
+      if cite.span:
+        start, end, _line = cite.span
+        cite.span = (offset+start, offset+end, line+_line-1)
+    return res
+
+
+  def _parseLazy(self, start, end, line):
+    # parse a single section recorded by the lazy scanner and return its
+    # fields and parse info
+    res = self._parseSection(self.content()[start:end], line)
+    if len(res) != 1:
+      raise RuntimeError(f'in bib file {self.path} (line {line}):\n'
+                         f'parsing error, unexpected content in citation '
+                         f'section')
+    return res[0].fields, res[0].fieldsParseInfo
+
+
+  def citesReference(self, content=None, firstLine=1):
     res = []
+    if content is None:
+      content = self.content()
 
     # parsing whole file with a characterwise state machine is the only
     # safe way to go...
@@ -51,7 +482,7 @@ class BibFile:
     currentItem = None
     currentValue = None
     currentValueParseInfo = None
-    currentLine = 1
+    currentLine = firstLine
     previousBackslash = False
     braceDepth = None
     quoteDepth = None
@@ -108,8 +539,11 @@ class BibFile:
                         + currentValue[_c:]
                        ).strip()
 
+      currentItem = sys.intern(currentItem)
       res[-1].fields[currentItem] = currentValue.strip()
-      res[-1].fieldsParseInfo[currentItem] = currentValueParseInfo
+      res[-1].fieldsParseInfo[currentItem] = (
+          tuple(currentValueParseInfo.get('opens', ())),
+          tuple(currentValueParseInfo.get('closes', ())))
       #io.dbg(f'created new field for citation {res[-1].key}',
       #       f'item: {currentItem}, value: {currentValue}',
       #       f'parseInfo: {currentValueParseInfo}',
@@ -120,7 +554,7 @@ class BibFile:
       braceDepth = None
       quoteDepth = None
 
-    for c in self.content():
+    for c in content:
       # @ sign while in "comment" -> transition to "section"
       if c == '@' and state == 'comment':
         _assert(currentSection is None)
@@ -369,21 +803,98 @@ class BibFile:
     return self._duplicates()[2]
 
 
+  def _endsWithNewline(self):
+    with open(self.path, 'rb') as f:
+      if f.seek(0, os.SEEK_END) == 0:
+        return False
+      f.seek(-1, os.SEEK_END)
+      return f.read(1) in (b'\n', b'\r')
+
+
+  def _write(self, content):
+    # write to temporary file first and replace the bib file afterwards to
+    # never leave a partially written bib file behind
+    path = os.path.realpath(self.path)
+    fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(path),
+                                   prefix='.'+os.path.basename(path),
+                                   suffix='.tmp')
+    try:
+      with os.fdopen(fd, 'w') as f:
+        f.write(content)
+      shutil.copymode(path, tmpPath)
+      os.replace(tmpPath, path)
+    except Exception:
+      if os.path.exists(tmpPath):
+        os.remove(tmpPath)
+      raise
+
+
+  def _reset(self):
+    self._content = None
+    self._cites = None
+    self._index = None
+
+
   def addCites(self, cites):
     if cites:
+      texts = [c.pretty() for c in cites]
+      parsed = getattr(self, '_cites', None) is not None
+      if parsed:
+        prefix = self.content()+('\n' if self._endsWithNewline() else '')
       with open(self.path, 'a') as f:
-        f.write('\n'+'\n\n'.join([c.pretty() for c in cites])+'\n')
-      self._cites = None
-      self.cites()
+        f.write('\n'+'\n\n'.join(texts)+'\n')
+      if not parsed:
+        self._reset()
+        return
+
+      # only parse the appended citations
+      content = prefix+'\n'+'\n\n'.join(texts)
+      offset, line = len(prefix)+1, prefix.count('\n')+2
+      try:
+        for text in texts:
+          self._cites.extend(self._parseAt(text, offset, line))
+          offset += len(text)+2
+          line += text.count('\n')+2
+      except RuntimeError:
+        self._reset()
+        self.cites()
+        return
+      self._content = content
+      self._index = None
 
 
   def setCites(self, cites):
-    newContent = '\n\n'.join([c.pretty() for c in cites])+'\n'
-    if newContent != self.content:
-      with open(self.path, 'w') as f:
-        f.write(newContent)
-      self._cites = None
+    # citations whose rendered text equals their section in the current file
+    # are kept as they are, only changed and new ones are parsed again
+    content = self.content()
+    own = {id(c) for c in (getattr(self, '_cites', None) or [])}
+    texts = [c.pretty() for c in cites]
+    unchanged = [id(c) in own and c.span is not None
+                   and content[c.span[0]:c.span[1]] == text
+                     for c, text in zip(cites, texts)]
+    newContent = '\n\n'.join(texts)+'\n'
+    if newContent == content+('\n' if self._endsWithNewline() else ''):
+      return
+    self._write(newContent)
+
+    res = []
+    offset, line = 0, 1
+    try:
+      for c, text, keep in zip(cites, texts, unchanged):
+        if keep:
+          c.span = (offset, offset+len(text), line)
+          res.append(c)
+        else:
+          res.extend(self._parseAt(text, offset, line))
+        offset += len(text)+2
+        line += text.count('\n')+2
+    except RuntimeError:
+      self._reset()
       self.cites()
+      return
+    self._content = newContent[:-1]
+    self._cites = res
+    self._index = None
 
 
   def rewrite(self):
@@ -392,11 +903,11 @@ class BibFile:
 
   def create(self):
     if not self.exists():
-      fname = self.fname
+      fname, lazy = self.fname, self.lazy
       with open(utils.replaceSuffix(fname, cfg.get('bibtex_extensions')[0]), 'a') as f:
         pass
       self.__dict__ = {}
-      self.__init__(fname)
+      self.__init__(fname, lazy=lazy)
 
 
   def fromRis(key, risFile):
@@ -475,24 +986,77 @@ class BibFile:
     return res
 
 
-  def lint(self, visited=[]):
+  def _isLinted(self, changedLines):
+    return (changedLines is None
+              or os.path.realpath(self.path or self.fname) in changedLines)
+
+
+  def _lintKey(self):
+    # like TexFile._lintKey(), results change with the paperman version
+    return cache.fileKey(self.path, _LINT_VERSION, io.__version__)
+
+
+  def prefetchLint(self, executor, changedLines=None):
+    # start checks in a worker process of executor, lint() picks up the
+    # result, results of unchanged files are loaded from cache instead
+    if self._lintFuture is not None or not self._isLinted(changedLines):
+      return
+    res = None
+    key = self.path and self._lintKey()
+    if key:
+      res = cache.load('bib-lint', key[0], key)
+    if res is None and self.path:
+      self._lintFuture = executor.submit(_lintInProcess, self.path)
+    elif res is not None:
+      self._lintFuture = concurrent.futures.Future()
+      self._lintFuture.set_result(res)
+
+
+  def lint(self, visited=None, changedLines=None):
+    # findings only depend on the file and are cached while it is unchanged,
+    # if changedLines is set they are only reported for changed files
+    if not self._isLinted(changedLines):
+      return
+    if self._lintFuture is not None:
+      res = self._lintFuture.result()
+    else:
+      res = self._lintCached()
+    for msg in res:
+      yield (self.path, '?', msg)
+
+
+  def _lintCached(self):
+    key = None
+    if self.path:
+      key = self._lintKey()
+    res = None
+    if key:
+      res = cache.load('bib-lint', key[0], key)
+    if res is None:
+      res = list(self._lintUncached())
+      if key and key == self._lintKey():
+        cache.store('bib-lint', key[0], key, res)
+    return res
+
+
+  def _lintUncached(self):
     reported = []
 
     # report duplicates
     for duplicates in self.duplicatesKeys():
       if duplicates not in reported:
         reported.append(duplicates)
-        yield (self.path, '?', f'found bib entries with duplicate '
-                  f'key {duplicates[0].key}')
+        yield (f'found bib entries with duplicate '
+               f'key {duplicates[0].key}')
 
     for duplicates in self.duplicatesGeneratedKeys():
       if duplicates not in reported:
         reported.append(duplicates)
-        yield (self.path, '?', f'found bib entries with conflicting generated '
-                  f'keys:\n{", ".join([d.key for d in duplicates])}')
+        yield (f'found bib entries with conflicting generated '
+               f'keys:\n{", ".join([d.key for d in duplicates])}')
 
     for duplicates in self.duplicatesAuthorTitle():
       if duplicates not in reported:
         reported.append(duplicates)
-        yield (self.path, '?', f'found bib entries with identical authors and title:\n'
-                  f'{", ".join([d.key for d in duplicates])}')
+        yield (f'found bib entries with identical authors and title:\n'
+               f'{", ".join([d.key for d in duplicates])}')
@@ -1,4 +1,5 @@
 import re
+import sys
 import requests
 import time
 import unidecode
@@ -146,14 +147,54 @@ def shouldBeProtected(fullString, string, askProtect=True):
 
 
 class Cite:
+  # large libraries contain many citations, slots avoid a __dict__ per instance
+  __slots__ = ('key', 'bibs', 'section', 'span', '_lazy', '_fields',
+               '_fieldsParseInfo', '_isHealthy', '_exists')
+
   def __init__(self, key, bibs=None, section=None, fields=None):
     self.key = key.strip()
     self.bibs = bibs
-    self.section = (None if section is None else section.strip().lower())
+    self.section = (None if section is None
+                      else sys.intern(section.strip().lower()))
+    self.span = None
+    self._lazy = None
+    self._isHealthy = None
+    self._exists = None
     self.fields = fields
     self.fieldsParseInfo = None
 
 
+  # fields of citations found by lazy bib files are parsed on first access
+  def _materialize(self):
+    if self._lazy is not None:
+      self._fields, self._fieldsParseInfo = self._lazy._parseLazy(*self.span)
+      self._lazy = None
+
+
+  @property
+  def fields(self):
+    self._materialize()
+    return self._fields
+
+
+  @fields.setter
+  def fields(self, fields):
+    self._materialize()
+    self._fields = fields
+
+
+  @property
+  def fieldsParseInfo(self):
+    self._materialize()
+    return self._fieldsParseInfo
+
+
+  @fieldsParseInfo.setter
+  def fieldsParseInfo(self, fieldsParseInfo):
+    self._materialize()
+    self._fieldsParseInfo = fieldsParseInfo
+
+
   def __repr__(self):
     return f'citation {self.key}'+('' if self.isHealthy() else ' (unhealthy)')
 
@@ -162,6 +203,10 @@ class Cite:
     return self.key == cite.key
 
 
+  def __hash__(self):
+    return hash(self.key)
+
+
   def compareAuthorTitle(self):
     cmp = lambda a: re.sub(r'[^a-z0-9]+', '', a.lower()).replace('and', '')
     return 'cmp'+cmp(self.get('author', ''))+cmp(self.get('title', ''))
@@ -207,10 +252,9 @@ class Cite:
     if value[0] != '{' and value[-1] != '}':
       value = '{'+str(value)+'}'
     io.dbg(f'setting new field self.fields[{item.lower()}] = {repr(value)}',
-           f'self.fieldsParseInfo[{item.lower()}] = {dict(opens=[0], closes=[len(value)-1])}')
-    self.fields[item.lower()] = value
-    self.fieldsParseInfo[item.lower()] = {'opens': [0],
-                                          'closes': [len(value)-1]}
+           f'self.fieldsParseInfo[{item.lower()}] = {((0,), (len(value)-1,))}')
+    self.fields[sys.intern(item.lower())] = value
+    self.fieldsParseInfo[sys.intern(item.lower())] = ((0,), (len(value)-1,))
 
 
   # return item from self.items with case insensitive matching
@@ -218,12 +262,17 @@ class Cite:
     if self.fields is None:
       return None, None
 
-    keys = list(self.fields.keys())
-    lkeys = [k.lower() for k in keys]
-    if item.lower() not in lkeys:
-      return None, None
-
-    k = keys[lkeys.index(item.lower())]
+    # field names are usually lowercase already, only scan all names if not
+    if item in self.fields:
+      k = item
+    elif item.lower() in self.fields:
+      k = item.lower()
+    else:
+      keys = list(self.fields.keys())
+      lkeys = [k.lower() for k in keys]
+      if item.lower() not in lkeys:
+        return None, None
+      k = keys[lkeys.index(item.lower())]
 
     # if limited by { and } or ", strip those
     f = self.fields[k]
@@ -238,37 +287,34 @@ class Cite:
 
 
   def insertNonexistingItems(self, cite):
-    lkeys = [k.lower() for k in self.fields.keys()]
+    lkeys = set([k.lower() for k in self.fields.keys()])
     for k, v in cite.fields.items():
-      if k not in lkeys:
-        parseInfo = {}
-        if k in v.fieldsParseInfo:
-          parseInfo = v.fieldsParseInfo[k]
+      if k.lower() not in lkeys:
+        parseInfo = cite.fieldsParseInfo.get(k, ((), ()))
         _k = k
         if cfg.get('bib_repair', 'make_all_items_lowercase'):
           _k = k.lower()
-        io.dbg(f'inserted field {_v}={v[:10]}{"" if len(v)<10 else "..."} into citation')
+        io.dbg(f'inserted field {_k}={v[:10]}{"" if len(v)<10 else "..."} into citation')
         self.fields[_k] = v
         self.fieldsParseInfo[_k] = parseInfo
 
 
-  @utils.cacheReturnValue
+  # results are cached by hand, utils.cacheReturnValue needs a __dict__
   def isHealthy(self):
     # list of forbidden characters in bibtex keys found here:
     # https://tex.stackexchange.com/questions/408530/what-characters-are-allowed-to-use-as-delimiters-for-bibtex-keys
-    return all([c not in self.key for c in FORBIDDEN_KEY_CHARS])
+    if self._isHealthy is None:
+      self._isHealthy = all([c not in self.key for c in FORBIDDEN_KEY_CHARS])
+    return self._isHealthy
 
 
-  @utils.cacheReturnValue
   def exists(self):
     #io.dbg(f'self.exists: {self.key=}, {[b.path for b in self.bibs]=}')
     if self.bibs is None:
       return None
-    for b in self.bibs:
-      if self in b.cites():
-        #io.dbg(f'exsists in {b.path}')
-        return True
-    return False
+    if self._exists is None:
+      self._exists = any(self.key in b.index() for b in self.bibs)
+    return self._exists
 
 
   def toString(self):
@@ -417,8 +463,8 @@ class Cite:
         # try to reformat curly braces etc. if parse info is available
         if (self.fieldsParseInfo is not None
               and k in self.fieldsParseInfo):
-          opens, closes = [self.fieldsParseInfo[k][_k]
-                                      for _k in ('opens', 'closes')]
+          # parse info is stored as tuples, work on copies
+          opens, closes = [list(p) for p in self.fieldsParseInfo[k]]
           if not opens and not closes:
             if v[0] != '{' and v[-1] != '}':
               v = '{'+v+'}'
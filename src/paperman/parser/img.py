@@ -1,8 +1,44 @@
 import os
 
 from .. import io
+from .. import walker
 from . import common
 
+# files of directories listed in this process by absolute path, each maps
+# names without suffix to the first file with that name
+_listings = {}
+
+
+def _index(files):
+  res = {}
+  for f in files:
+    res.setdefault(common.stripSuffix(f), f)
+  return res
+
+
+def _listing(path):
+  key = os.path.abspath(path)
+  res = _listings.get(key)
+  if res is None:
+    try:
+      _, _, files = walker.listdir(path)
+    except OSError:
+      files = []
+    res = _listings[key] = _index(files)
+  return res
+
+
+def rememberListing(path, files):
+  # reuse files of path found by a directory walk for resolving images
+  key = os.path.abspath(path)
+  if key not in _listings:
+    _listings[key] = _index(files)
+
+
+def forgetListing(path):
+  # has to be called after files were added to or removed from path
+  _listings.pop(os.path.abspath(path), None)
+
 
 class ImgFile:
   def __init__(self, fname, paths=None):
@@ -12,15 +48,13 @@ class ImgFile:
     if paths is None:
       self.path = os.path.normpath(fname)
     else:
+      stem = common.stripSuffix(os.path.basename(fname))
       for p in list(paths)+['.']:
         _p = os.path.join(p, os.path.dirname(fname))
-        if os.path.isdir(_p):
-          for f in os.listdir(_p):
-            if common.filenamesEqual(f, os.path.basename(fname)):
-              self.path = os.path.join(p, f)
-              break
-          if self.path is not None:
-            break
+        f = _listing(_p).get(stem)
+        if f is not None:
+          self.path = os.path.join(_p, f)
+          break
 
   def containsNewcommandArg(self):
     return common.containsNewcommandArg(self.fname)
@@ -31,6 +65,11 @@ class ImgFile:
     return common.filenamesEqual(os.path.basename(self.fname),
                                 os.path.basename(img.fname))
 
+  def __hash__(self):
+    # equal files have equal names without suffix, whether paths are known
+    # or not
+    return hash(common.stripSuffix(os.path.basename(self.fname)))
+
   def __lt__(self, img):
     return self.path and img.path and self.path < img.path
 
@@ -1,16 +1,183 @@
 import re
 import os
+import hashlib
 import functools
+import concurrent.futures
 
 from .. import io
 from .. import cfg
 from .. import utils
+from .. import cache
+from .. import ahocorasick
 from . import common
 
 from .bib import BibFile
 from .img import ImgFile
 from .cite import Cite
 
+# increment whenever results change to invalidate cached results
+_EXTRACT_VERSION = 2
+_LINT_VERSION = 1
+_TOPLEVEL_VERSION = 1
+
+# number of bytes at start and end of files that are probed for a document
+# environment before the whole file is read
+_PROBE_SIZE = 8192
+
+# commands are found in a single pass over the content, only the ones of
+# interest with a mandatory argument are recorded
+_COMMAND = re.compile(r'\\([a-zA-Z@]+)\*?\s*((?:\[[^\[\]]*\]\s*)*)')
+_OPTION = re.compile(r'\[([^\[\]]*)\]')
+_ARGUMENT = re.compile(r'\{([^{}]+)\}')
+_GRAPHICSPATH_ARGUMENT = re.compile(r'\{((\s*\{[^{}]+\}\s*)+)\}')
+_COMMANDS = {'input', 'include', 'begin', 'end', 'graphicspath', 'includegraphics',
+             'usepackage', 'addbibresource', 'bibliography'}
+
+# patterns applied by the linter to every line
+_AUTHOR = re.compile(r'^([^\n]*)\\author\{([^}]*)\}([^\n]*)', re.M)
+_FIGURE_BEGIN = re.compile(r'\\begin\s*{\s*figure\s*}')
+_FIGURE_END = re.compile(r'\\end\s*{\s*figure\s*}')
+_LABEL = re.compile(r'\\[^\[\]{}]*label\s*[^\[\]{}]*\s*(\[[^[\]]*\])?{([^{}]+)}')
+_REF = re.compile(r'\\[^\[\]{}]*ref\s*[^\[\]{}]*\s*(\[[^[\]]*\])?{([^{}]+)}')
+_UNPROTECTED_MATH = re.compile(r'[^a-zA-Z0-9\{\\S]')
+_WHITESPACE = re.compile(r'\s+')
+_ALPHANUMERIC = re.compile(r'[a-zA-Z0-9]')
+_COMMA_BEFORE = [(word, re.compile(r',\s*'+word)) for word in ('because', 'that')]
+
+
+def _isOfInterest(name):
+  # any command containing cite, ref or label is treated as such, e.g.
+  # \autocite, \eqref or \zlabel
+  return (name in _COMMANDS
+          or 'cite' in name or 'ref' in name or 'label' in name)
+
+
+def _extract(content, lineNumbers):
+  # return list of (name, options, argument, line, text) of all commands of
+  # interest, lineNumbers maps lines of content to lines of the file
+  res = []
+  i = 0
+  line, lineCounted = 0, 0
+  while True:
+    m = _COMMAND.search(content, i)
+    if not m:
+      break
+    name = m.group(1)
+    # options may contain commands of interest, e.g. \item[\cite{knuth}],
+    # such that scanning continues right after the name
+    i = m.end(1)
+    if not _isOfInterest(name):
+      continue
+    a = (_GRAPHICSPATH_ARGUMENT if name == 'graphicspath'
+                                else _ARGUMENT).match(content, m.end())
+    if not a:
+      continue
+    if '\\' not in m.group(2):
+      i = a.end()
+    line += content.count('\n', lineCounted, m.start())
+    lineCounted = m.start()
+    res.append((name, _OPTION.findall(m.group(2)), a.group(1),
+                lineNumbers[line], content[m.start():a.end()]))
+  return res
+
+
+def _mightContainDocument(path):
+  # toplevel files mention "document" in \documentclass or \begin{document}
+  # near their start or in \end{document} near their end, other files are
+  # rejected after reading the first and last few kB only
+  with open(path, 'rb') as f:
+    if b'document' in f.read(_PROBE_SIZE):
+      return True
+    size = f.seek(0, os.SEEK_END)
+    if size <= _PROBE_SIZE:
+      return False
+    f.seek(max(0, size-_PROBE_SIZE))
+    return b'document' in f.read()
+
+
+class _Source:
+  # content of a physical file and analysis results that do not depend on
+  # where the file is included from
+  def __init__(self, path, stat):
+    self.path = path
+    self.stat = stat
+
+
+  @utils.cacheReturnValue
+  def raw(self):
+    # file is read once such that content and hash always match
+    with open(self.path, 'r') as f:
+      return f.read()
+
+
+  @utils.cacheReturnValue
+  def fileHash(self):
+    return hashlib.sha1(self.raw().encode()).hexdigest()
+
+
+  @utils.cacheReturnValue
+  def content(self):
+    return '\n'.join([l for _, l in self.enumContent()])
+
+
+  @utils.cacheReturnValue
+  def enumContent(self):
+    # split like iterating over the file does, i.e. only at newlines
+    lines = self.raw().split('\n')
+    if lines[-1] == '':
+      lines.pop()
+    return [(i+1, l) for i, l in enumerate(lines)
+                     if not l.strip().startswith('%')]
+
+
+  @utils.cacheReturnValue
+  def commands(self):
+    # record of all commands of interest, see _extract(), cached for
+    # unchanged files
+    key = (self.fileHash(), _EXTRACT_VERSION)
+    res = cache.load('tex', self.path, key)
+    if res is None:
+      res = _extract(self.content(), [ln for ln, _ in self.enumContent()])
+      cache.store('tex', self.path, key, res)
+    return res
+
+
+  @utils.cacheReturnValue
+  def containsDocument(self):
+    # the verdict is cached while the file is unchanged, files that cannot
+    # contain a document environment are rejected without reading them
+    # entirely
+    key = cache.fileKey(self.path, _TOPLEVEL_VERSION)
+    res = None
+    if key:
+      res = cache.load('toplevel', key[0], key)
+    if res is None:
+      res = _mightContainDocument(self.path) and self._parseDocument()
+      if key and key == cache.fileKey(self.path, _TOPLEVEL_VERSION):
+        cache.store('toplevel', key[0], key, res)
+    return res
+
+
+  def _parseDocument(self):
+    envs = set([(c[0], c[2].strip())
+                    for c in self.commands() if c[0] in ('begin', 'end')])
+    return ('begin', 'document') in envs and ('end', 'document') in envs
+
+
+# files read in this process by real path, entries are replaced if the file
+# changed since it was read
+_sources = {}
+
+
+def _source(path):
+  realPath = os.path.realpath(path)
+  s = os.stat(realPath)
+  stat = (s.st_size, s.st_mtime_ns)
+  res = _sources.get(realPath)
+  if res is None or res.stat != stat:
+    res = _sources[realPath] = _Source(realPath, stat)
+  return res
+
 
 class TexFile:
   def __init__(self, path, toplevel=None, raiseOnIncludeNotFound=None,
@@ -24,6 +191,7 @@ class TexFile:
     self.enableIncludeImport = enableIncludeImport
     self._bibHealthy = None
     self._packageIncludes = None
+    self._lintFuture = None
 
 
   def __repr__(self):
@@ -34,6 +202,10 @@ class TexFile:
     return self.path and file.path and self.path == file.path
 
 
+  def __hash__(self):
+    return hash(self.path)
+
+
   def __lt__(self, file):
     return self.path and file.path and self.path < file.path
 
@@ -43,17 +215,33 @@ class TexFile:
 
 
   @utils.cacheReturnValue
+  def source(self):
+    # content and analysis of the file are shared by all instances
+    return _source(self.path)
+
+
+  def raw(self):
+    return self.source().raw()
+
+
+  def fileHash(self):
+    return self.source().fileHash()
+
+
   def content(self):
-    with open(self.path, 'r') as f:
-      return '\n'.join([l.rstrip('\n') for l in f
-                                if not l.strip().startswith('%')])
+    return self.source().content()
 
 
-  @utils.cacheReturnValue
   def enumContent(self):
-    with open(self.path, 'r') as f:
-      return [(i+1, l.rstrip('\n')) for i, l in enumerate(f)
-                                  if not l.strip().startswith('%')]
+    return self.source().enumContent()
+
+
+  def commands(self):
+    return self.source().commands()
+
+
+  def _findCommands(self, *names):
+    return [c for c in self.commands() if c[0] in names]
 
 
   def recurseThroughIncludes(self):
@@ -64,13 +252,12 @@ class TexFile:
   @utils.cacheReturnValue
   def includes(self):
     res = []
-    if re.search(r'\\include\s*(\[[^[\]]*\])?\s*\{([^{}]+)\}', self.content()):
+    if self._findCommands('include'):
       io.warn(r'found \include{} command in tex file ',
               f'"{self.path}"',
               r'paperman does not support include logic and',
               r'might oversee missing/unused imgs/citation/includes')
-    for m in re.finditer(r'\\input\s*(\[[^[\]]*\])?\s*\{([^{}]+)\}', self.content()):
-      fname = m.groups()[-1]
+    for _, _, fname, _, _ in self._findCommands('input'):
       if not fname.endswith('.tex'):
         fname += '.tex'
       includePath = common.pathRelTo(self, fname)
@@ -101,10 +288,11 @@ class TexFile:
 
   @utils.cacheReturnValue
   def isToplevel(self):
-    return (all([re.search(s, self.content())
-                      for s in (r'\\begin\{document\}',
-                                r'\\end\{document\}')])
-            and self.toplevel is None)
+    return self.toplevel is None and self.containsDocument()
+
+
+  def containsDocument(self):
+    return self.source().containsDocument()
 
 
   @utils.cacheReturnValue
@@ -125,11 +313,10 @@ class TexFile:
       detectedPaths(i.graphicspath(paths=paths, latexlines=latexlines))
 
     # scan self
-    for m in re.finditer(r'\\graphicspath\s*\{((\s*\{[^{}]+\}\s*)+)\}',
-                         self.content()):
-      latexlines.append([self.path, m.string[m.start():m.end()]])
+    for _, _, arg, _, text in self._findCommands('graphicspath'):
+      latexlines.append([self.path, text])
       _p = [m.groups()[0] for m in re.finditer(r'\{([^{}]*)\}',
-                                               re.sub(r'\s+', '', m.groups()[0]))]
+                                               re.sub(r'\s+', '', arg))]
       detectedPaths([common.pathRelTo(self, p) for p in _p])
 
     for p in paths:
@@ -151,61 +338,49 @@ class TexFile:
 
   @utils.cacheReturnValue
   def imgs(self):
-    res = []
-    for i in self.includes():
-      for file in i.imgs():
-        if file not in res:
-          res.append(file)
-    for m in re.finditer(r'\\includegraphics\s*(\[[^[\]]*\])?\s*\{([^{}]+)\}',
-                         self.content()):
-      file = ImgFile(m.groups()[-1], paths=self.graphicspath())
+    res = dict.fromkeys([file for i in self.includes()
+                                for file in i.imgs()])
+    for _, _, arg, _, text in self._findCommands('includegraphics'):
+      file = ImgFile(arg, paths=self.graphicspath())
       if file not in res:
-        res.append(file)
+        res[file] = None
         if os.path.sep in file.fname:
           io.warn(f'in file "{self.path}":',
-                  '"'+m.string[m.start():m.end()]+'"',
+                  f'"{text}"',
                   r'it is recommended to define image folders in the preample with',
                   r'\graphicspath{} and to use only names in \includegraphics '
                   f'calls, e.g.:',
                   f'\\graphicspath{{ ... {{{os.path.dirname(file.fname)+os.path.sep}}} ... }}'
                   f'and',
                   f'\\includegraphics[ ... ]{{{os.path.basename(file.fname)}}}')
-    return res
+    return list(res)
 
 
   @utils.cacheReturnValue
   def bibs(self):
-    res = []
     if self.toplevel is None:
       self._packageIncludes = 0
     elif self.toplevel._packageIncludes is None:
       raise ValueError('TexFile.bibs() method should only be called directly '
                        'on toplevel files')
 
-    for i in self.includes():
-      for b in i.bibs():
-        if b not in res:
-          res.append(b)
+    res = dict.fromkeys([b for i in self.includes()
+                             for b in i.bibs()])
 
     # search for biblatex package loading
-    for m in re.finditer(r'\\usepackage\s*(\[[^[\]]*\])?\s*{biblatex}',
-                         self.content()):
+    packages = self._findCommands('usepackage')
+    for _, options, _, _, text in [c for c in packages if c[2] == 'biblatex']:
       (self.toplevel or self)._packageIncludes += 1
-      options = ''
-      if len(m.groups()):
-        options = m.groups()[0]
-      m = re.search(r'backend\s*=\s*biber', options)
-      if not m:
+      if not re.search(r'backend\s*=\s*biber', ','.join(options)):
         io.warn(f'in file "{self.path}":',
-                '"'+m.string[m.start():m.end()]+'"',
+                f'"{text}"',
                 f'it is recommended to use biblatex with backend=biber option')
 
     # search for deprectaed natbib and warn
-    for m in re.finditer(r'\\usepackage\s*(\[[^[\]]*\])?\s*{natbib}',
-                         self.content()):
+    for _, _, _, _, text in [c for c in packages if c[2] == 'natbib']:
       (self.toplevel or self)._packageIncludes += 1
       io.warn(f'in file "{self.path}":',
-              '"'+m.string[m.start():m.end()]+'"',
+              f'"{text}"',
               f'natbib pacakge is deprecated, it is recommended to use',
               f'the biblatex package with backend=biber instead')
       (self.toplevel or self)._bibHealthy = False
@@ -217,17 +392,16 @@ class TexFile:
 
     # search for bibliography and addbibresource commands
     for s in ('addbibresource', 'bibliography'):
-      for m in re.finditer(r'.*\\'+s+r'\s*(\[[^[\]]*\])?\s*{([^{}]+)}.*',
-                           self.content()):
-        file = BibFile(common.pathRelTo(self, m.groups()[-1]))
+      for _, _, arg, _, _ in self._findCommands(s):
+        file = BibFile(common.pathRelTo(self, arg), lazy=True)
         if not file.exists():
           io.warn(f'file "{self.path}" included',
                   f'bibliography file "{file.fname}"',
                   f'which does not seem to exist')
           (self.toplevel or self)._bibHealthy = False
         if file not in res:
-          res.append(file)
-    return res
+          res[file] = None
+    return list(res)
 
 
   def bibHealthy(self):
@@ -243,17 +417,16 @@ class TexFile:
 
   @utils.cacheReturnValue
   def cites(self):
-    res = []
+    res = {}
     # scan through all commands that look like cite commands
-    for m in re.finditer(r'\\[^\[\]{}]*cite\s*[^\[\]{}]*\s*(\[[^[\]]*\])?{([^{}]+)}',
-                         self.content()):
-      for s in m.groups()[-1].split():
+    for c in self.commands():
+      if 'cite' not in c[0]:
+        continue
+      for s in c[2].split():
         for _s in s.split(','):
-          if _s.strip():
-            cite = Cite(_s.strip(), self.bibs())
-            if cite not in res:
-              res.append(cite)
-    return res
+          if _s.strip() and _s.strip() not in res:
+            res[_s.strip()] = Cite(_s.strip(), self.bibs())
+    return list(res.values())
 
 
   @utils.cacheReturnValue
@@ -263,55 +436,71 @@ class TexFile:
 
   @utils.cacheReturnValue
   def refs(self):
-    res = []
     # scan through all commands that look like ref commands
-    for m in re.finditer(r'\\[^\[\]{}]*ref\s*[^\[\]{}]*\s*(\[[^[\]]*\])?{([^{}]+)}',
-                         self.content()):
-      for _s in m.groups()[-1].split():
-        if _s.strip():
-          ref = _s.strip()
-          if ref not in res:
-            res.append(ref)
-    return res
+    res = dict.fromkeys([_s for c in self.commands() if 'ref' in c[0]
+                              for _s in c[2].split()])
+    return list(res)
 
 
   @utils.cacheReturnValue
   def labels(self):
-    res = []
+    res = {}
     # scan through all commands that look like label commands
-    for m in re.finditer(r'\\[^\[\]{}]*label\s*[^\[\]{}]*\s*(\[[^[\]]*\])?{([^{}]+)}',
-                         self.content()):
-      for _s in m.groups()[-1].split():
-        if _s.strip():
-          label = _s.strip()
-          if label in res:
-            io.warn(f'found duplicate \\label{{{label}}} in file {self.path}')
-          else:
-            res.append(label)
-    return res
+    for c in self.commands():
+      if 'label' not in c[0]:
+        continue
+      for label in c[2].split():
+        if label in res:
+          io.warn(f'found duplicate \\label{{{label}}} in file {self.path}')
+        else:
+          res[label] = None
+    return list(res)
 
 
   @utils.cacheReturnValue
-  def lint(self, visited=[], unusedLabels=[], brokenRefs=[]):
+  def lint(self, visited=None, unusedLabels=set(), brokenRefs=set(),
+           changedLines=None):
+    # if changedLines is set, only findings on lines listed there for each
+    # file are reported, a file mapped to None is checked entirely
+    if visited is None:
+      visited = set()
+
+    # bibliographies of included files can only be detected after the ones
+    # of the toplevel file
+    if self.toplevel is None:
+      self.bibs()
 
     # lint included files
     for i in self.includes():
       if i not in visited:
-        for l in i.lint(visited=visited):
+        for l in i.lint(visited=visited, unusedLabels=unusedLabels,
+                        brokenRefs=brokenRefs, changedLines=changedLines):
           yield l
-        visited.append(i)
+        visited.add(i)
 
     # lint included bib files
     for b in self.bibs():
       if b not in visited:
-        for l in b.lint(visited=visited):
+        for l in b.lint(visited=visited, changedLines=changedLines):
           yield l
-        visited.append(b)
+        visited.add(b)
+
+    isChanged = lambda ln: True
+    if changedLines is not None:
+      lines = changedLines.get(os.path.realpath(self.path), set())
+      isChanged = lambda ln: lines is None or ln in lines
+
+    # results of checks that only depend on file and config are cached
+    authors, findings = self._lintFile()
+
+    # author entries have no line, they are only checked, and possibly
+    # asked about, in files with changed lines
+    if changedLines is not None and lines is not None and not lines:
+      authors = []
 
     # detect author entries and check whether they exist in whitelist
-    authorPattern = r'([^\n]*)\\author\{([^}]*)\}([^\n]*)'
     knownAuthors = list(cfg.get('lint', 'known_authors'))
-    for pre, authorName, post in re.findall(authorPattern, self.content(), re.M):
+    for pre, authorName, post in authors:
       # skip lines marked as ok:
       textAround = pre + ' ' + post
       if 'nolint' in textAround.split() or '%nolint' in textAround.split():
@@ -328,7 +517,71 @@ class TexFile:
           yield (self.path, '?',
                  f'author name {authorName} is not in known_authors list')
 
-    # go through file line by line and lint
+    # findings about unused labels and broken references depend on the whole
+    # project and are filtered here, they are reported for unchanged lines too
+    for ln, msg, condition in findings:
+      if (condition is None and isChanged(ln)
+            or condition and condition[0] == 'label'
+                         and condition[1] in unusedLabels
+            or condition and condition[0] == 'ref'
+                         and condition[1] in brokenRefs):
+        yield (self.path, ln, msg)
+
+    visited.add(self)
+
+
+  def _lintConfig(self):
+    avoidCommands = list(cfg.get('lint', 'avoid_commands'))
+    if self.isToplevel():
+      avoidCommands += list(cfg.get('lint', 'avoid_commands_in_toplevel'))
+    return tuple(avoidCommands), tuple(cfg.get('lint', 'avoid_words'))
+
+
+  def _lintKey(self, avoidCommands, avoidWords):
+    return (self.fileHash(), _lintConfigHash(avoidCommands, avoidWords),
+            _LINT_VERSION, io.__version__)
+
+
+  def prefetchLint(self, executor):
+    # start line by line checks in a worker process of executor, lint() picks
+    # up the result, results of unchanged files are loaded from cache instead
+    if self._lintFuture is not None:
+      return
+    avoidCommands, avoidWords = self._lintConfig()
+    res = cache.load('lint', os.path.realpath(self.path),
+                     self._lintKey(avoidCommands, avoidWords))
+    if res is None:
+      self._lintFuture = executor.submit(_lintInProcess, self.path,
+                                         avoidCommands, avoidWords)
+    else:
+      self._lintFuture = concurrent.futures.Future()
+      self._lintFuture.set_result(res)
+
+
+  def _lintFile(self):
+    # return author entries as (text before, name, text after) and findings
+    # of line by line checks as (line, message, condition), condition is
+    # ('label', name) or ('ref', name) for findings that only apply if the
+    # label is unused or the reference is broken, else None
+    if self._lintFuture is not None:
+      return self._lintFuture.result()
+    avoidCommands, avoidWords = self._lintConfig()
+    res = cache.load('lint', os.path.realpath(self.path),
+                     self._lintKey(avoidCommands, avoidWords))
+    if res is None:
+      res = self._lintUncached(avoidCommands, avoidWords)
+    return res
+
+
+  def _lintUncached(self, avoidCommands, avoidWords):
+    res = (_AUTHOR.findall(self.content()),
+           list(self._lintLines(*_lintRules(avoidCommands, avoidWords))))
+    cache.store('lint', os.path.realpath(self.path),
+                self._lintKey(avoidCommands, avoidWords), res)
+    return res
+
+
+  def _lintLines(self, commandRules, wordRules, nAvoidWords):
     currentFigureLabel = None
     for ln, l in self.enumContent():
 
@@ -340,26 +593,22 @@ class TexFile:
       if l.strip().startswith('%'):
         continue
 
-      # check whether every figure environment has a label, and check whether labels
-      # are within unusedLabels list
-      if re.search(r'\\begin\s*{\s*figure\s*}', l):
+      # check whether every figure environment has a label, whether labels
+      # are used and references are not broken is checked by lint()
+      if _FIGURE_BEGIN.search(l):
         currentFigureLabel = None
-      if m:=re.search(r'\\[^\[\]{}]*label\s*[^\[\]{}]*\s*(\[[^[\]]*\])?{([^{}]+)}', l):
+      if m:=_LABEL.search(l):
         currentFigureLabel = m.groups()[-1].strip()
-        if currentFigureLabel in unusedLabels:
-          yield (self.path, ln,
-                 f'label {repr(currentFigureLabel)} is never used in a \\ref command')
-      if re.search(r'\\end\s*{\s*figure\s*}', l):
+        yield (ln,
+               f'label {repr(currentFigureLabel)} is never used in a \\ref command',
+               ('label', currentFigureLabel))
+      if _FIGURE_END.search(l):
         if not currentFigureLabel:
-          yield (self.path, ln,
-                 r'found figure environment without \label')
+          yield (ln, r'found figure environment without \label', None)
 
-      # check whether ref command is among broken refs list
-      if m:=re.search(r'\\[^\[\]{}]*ref\s*[^\[\]{}]*\s*(\[[^[\]]*\])?{([^{}]+)}', l):
+      if m:=_REF.search(l):
         ref = m.groups()[-1].strip()
-        if ref in brokenRefs:
-          yield (self.path, ln,
-                 f'no label exists for reference {repr(ref)}')
+        yield (ln, f'no label exists for reference {repr(ref)}', ('ref', ref))
 
 
       # search for dollars without line break protection
@@ -382,66 +631,132 @@ class TexFile:
           doWarn = False
           #print(extr[1], extr[-2], re.search(r'[^a-zA-Z0-9\\S]', extr))
           if ((extr[1] != '{' or extr[-2] != '}')
-                and re.search(r'[^a-zA-Z0-9\{\\S]', extr[2:-2])):
-            yield (self.path, ln,
+                and _UNPROTECTED_MATH.search(extr[2:-2])):
+            yield (ln,
                    f'"{extr}"\n'
                    'math should be wrapped in curly braces to avoid\n'
-                   'line breaks: not $a = b$ but ${a = b}$')
+                   'line breaks: not $a = b$ but ${a = b}$',
+                   None)
       if doWarn:
-        yield (self.path, ln,
+        yield (ln,
                'math should be wrapped in curly braces to avoid\n'
-               'line breaks: not $a = b$ but ${a = b}$')
+               'line breaks: not $a = b$ but ${a = b}$',
+               None)
 
       # find commands that should not used or not be used in toplevel files
-      avoidCommands = list(cfg.get('lint', 'avoid_commands'))
-      if self.isToplevel():
-        avoidCommands += list(cfg.get('lint', 'avoid_commands_in_toplevel'))
-      for cmd in avoidCommands:
-        cmd = cmd.strip(r'\ {}')
-        if len(cmd) == 1:
-          io.warn(f'command {cmd} in avoid_commands list is only one '
-                   'character long')
-        if re.search('\\\\'+cmd, l):
-          bs = '\\'
-          yield (self.path, ln,
-                 f'found latex command {bs}{cmd}, which is on avoid-list')
-
-      # detect words in avoid list
-      avoidWords = list(cfg.get('lint', 'avoid_words'))
-      for word in avoidWords:
-        # \b matches "word boundaries", i.e. white-spaces, string start/end etc.
-        if re.search(r'\b'+word.lower()+r'\b', l.lower()):
-          yield (self.path, ln,
-                 f'found word {word}, which is on avoid-list')
+      for i in commandRules.matches(l):
+        yield (ln, commandRules.messages[i], None)
+
+      # detect words in avoid list and violations of writing conventions,
+      # the latter are reported after the other checks
+      lower = l.lower()
+      matches = wordRules.matches(lower)
+      for i in matches:
+        if i < nAvoidWords:
+          yield (ln, wordRules.messages[i], None)
 
       # find double words
-      _l = re.sub(r'\s+', ' ', l.replace(',', '').replace('.', ''))
+      _l = _WHITESPACE.sub(' ', l.replace(',', '').replace('.', ''))
       for w1, w2 in zip(_l.split()[:-1], _l.split()[1:]):
-        if w1 == w2 and re.match(r'[a-zA-Z0-9]', w1):
-          yield (self.path, ln,
-                 f'found duplicate word "{w1}"')
+        if w1 == w2 and _ALPHANUMERIC.match(w1):
+          yield (ln, f'found duplicate word "{w1}"', None)
 
       # detect commas before that and because
-      for word in ('because', 'that'):
-        if re.search(r',\s*'+word, l.lower()):
-          yield (self.path, ln,
-                 f'found comma before {word}')
-
-      # detect violations of writing conventions
-      correctWrong, badWords = _parseWritingConventions()
-      for correct, wrong in correctWrong:
-        for w in wrong:
-          if w.lower() in l.lower():
-            yield (self.path, ln,
-                   f'{repr(w)} is listed as wrong in writing conventions,\n'
-                   f'suggested spelling is {repr(correct)}')
-      for badWord, reason in badWords:
-        if badWord.lower() in l.lower():
-          yield (self.path, ln,
-                 f'{repr(badWord)} is listed as a bad word in writing conventions,\n'
-                 f'reason: {reason}')
-
-    visited.append(self)
+      for word, pattern in _COMMA_BEFORE:
+        if pattern.search(lower):
+          yield (ln, f'found comma before {word}', None)
+
+      for i in matches:
+        if i >= nAvoidWords:
+          yield (ln, wordRules.messages[i], None)
+
+
+def _lintInProcess(path, avoidCommands, avoidWords):
+  # entry point of worker processes of parallel lint, see prefetchLint()
+  return TexFile(path)._lintUncached(avoidCommands, avoidWords)
+
+
+def _isLiteral(pattern):
+  return pattern and not any([c in pattern for c in '.^$*+?{}[]\\|()'])
+
+
+def _isWordBoundary(s, i):
+  # same as \b of regular expressions at position i of s
+  isWord = lambda c: c.isalnum() or c == '_'
+  return (i > 0 and isWord(s[i-1])) != (i < len(s) and isWord(s[i]))
+
+
+class _RuleSet:
+  # rules are (literal, regex, wordBoundaries, message), rules with literal
+  # set are matched by a single automaton, optionally only at word
+  # boundaries, the others by their regex
+  def __init__(self, rules):
+    self.messages = [r[3] for r in rules]
+    literals = [(i, r) for i, r in enumerate(rules) if r[0]]
+    self._ids = [i for i, _ in literals]
+    self._boundaries = [r[2] for _, r in literals]
+    self._automaton = ahocorasick.Automaton([r[0] for _, r in literals])
+    self._regexes = [(i, re.compile(r[1])) for i, r in enumerate(rules)
+                                           if not r[0]]
+
+
+  def matches(self, s):
+    # return indices of all rules matching s in rule order
+    res = set()
+    lengths = self._automaton.lengths
+    for start, k in self._automaton.findall(s):
+      if self._boundaries[k] and not (
+            _isWordBoundary(s, start)
+            and _isWordBoundary(s, start+lengths[k])):
+        continue
+      res.add(self._ids[k])
+    for i, regex in self._regexes:
+      if regex.search(s):
+        res.add(i)
+    return sorted(res)
+
+
+@functools.cache
+def _lintRules(avoidCommands, avoidWords):
+  # compile avoid lists from config and writing conventions, arguments are
+  # tuples to be hashable, returns rules matched against lines, rules matched
+  # against lowercase lines and the number of avoid words among the latter
+  commands = []
+  for cmd in avoidCommands:
+    cmd = cmd.strip(r'\ {}')
+    if len(cmd) == 1:
+      io.warn(f'command {cmd} in avoid_commands list is only one '
+               'character long')
+    bs = '\\'
+    commands.append((_isLiteral(cmd) and bs+cmd, '\\\\'+cmd, False,
+                     f'found latex command {bs}{cmd}, which is on avoid-list'))
+
+  # \b matches "word boundaries", i.e. white-spaces, string start/end etc.
+  words = []
+  for word in avoidWords:
+    words.append((_isLiteral(word.lower()) and word.lower(),
+                  r'\b'+word.lower()+r'\b', True,
+                  f'found word {word}, which is on avoid-list'))
+
+  # writing conventions are plain substrings
+  correctWrong, badWords = _parseWritingConventions()
+  conventions = []
+  for correct, wrong in correctWrong:
+    for w in wrong:
+      conventions.append((w.lower(), re.escape(w.lower()), False,
+                          f'{repr(w)} is listed as wrong in writing conventions,\n'
+                          f'suggested spelling is {repr(correct)}'))
+  for badWord, reason in badWords:
+    conventions.append((badWord.lower(), re.escape(badWord.lower()), False,
+                        f'{repr(badWord)} is listed as a bad word in writing conventions,\n'
+                        f'reason: {reason}'))
+  return _RuleSet(commands), _RuleSet(words+conventions), len(words)
+
+
+@functools.cache
+def _lintConfigHash(avoidCommands, avoidWords):
+  config = repr((avoidCommands, avoidWords, _parseWritingConventions()))
+  return hashlib.sha1(config.encode()).hexdigest()
 
 
 @functools.cache
@@ -493,4 +808,4 @@ def _parseWritingConventions():
       io.warn(f'lint.writing_conventions_path is set to '
               f'{repr(path)} in config file but the path does not exist')
 
-    return correctWrong, badWords
\ No newline at end of file
+  return correctWrong, badWords
\ No newline at end of file
@@ -4,6 +4,7 @@ from . import cfg
 from . import io
 from . import utils
 from . import parser
+from . import walker
 
 
 class Project:
@@ -12,6 +13,42 @@ class Project:
     self.texFileKwargs = kwargs
 
 
+  def _listTree(self, origin):
+    # walk through directories below origin once and remember all files, such
+    # that looking for toplevel files and images needs a single walk
+    if not hasattr(self, '_trees'):
+      self._trees = {}
+    if origin in self._trees:
+      return self._trees[origin]
+
+    res = []
+    hasWarnedDepth = False
+    for root, dirs, files in walker.walk(origin):
+
+      # abort tree is too deep
+      if root.count(os.sep)-origin.count(os.path.sep)-2 > cfg.get('max_directory_depth'):
+        io.verb(f'skipping subfolders of {root}')
+        if not hasWarnedDepth:
+          hasWarnedDepth = True
+          io.warn(f'reached max_directory_depth='
+                  f'{cfg.get("max_directory_depth")} when recursing '
+                  f'through the current directory, ignoring deeper '
+                  f'levels')
+        dirs.clear()
+
+      # skip git directories
+      while True:
+        i = [d for d in dirs if d.startswith('.git')]
+        if not i:
+          break
+        dirs.remove(i[0])
+
+      res.append((root, files))
+      parser.img.rememberListing(root, files)
+    self._trees[origin] = res
+    return res
+
+
   def _walk(self, find):
     # walk through directories and find specified stuff
     res = []
@@ -28,27 +65,8 @@ class Project:
             origins.append(p)
 
     # walk through directories
-    hasWarnedDepth = False
     for o in origins:
-      for root, dirs, files in os.walk(o, topdown=True):
-
-        # abort tree is too deep
-        if root.count(os.sep)-o.count(os.path.sep)-2 > cfg.get('max_directory_depth'):
-          io.verb(f'skipping subfolders of {root}')
-          if not hasWarnedDepth:
-            hasWarnedDepth = True
-            io.warn(f'reached max_directory_depth='
-                    f'{cfg.get("max_directory_depth")} when recursing '
-                    f'through the current directory, ignoring deeper '
-                    f'levels')
-          dirs.clear()
-
-        # skip git directories
-        while True:
-          i = [d for d in dirs if d.startswith('.git')]
-          if not i:
-            break
-          dirs.remove(i[0])
+      for root, files in self._listTree(o):
 
         # find and open tex files to detect toplevel
         for f in files:
@@ -63,13 +81,10 @@ class Project:
             if (any([f.endswith('.'+(e[1:] if e.startswith('.') else e))
                                   for e in cfg.get('graphics_extensions')])
                 # skip pdfs that seem to be builds of tex files
-                and not (f.endswith('.pdf')
-                          and os.path.exists(os.path.join(root, f[:-4]+'.tex')))):
+                and not (f.endswith('.pdf') and f[:-4]+'.tex' in files)):
               io.verb(f'found img {os.path.join(root, f)}')
-              file = parser.ImgFile(os.path.join(root, f))
-              if file not in res:
-                res.append(file)
-    return res
+              res.append(parser.ImgFile(os.path.join(root, f)))
+    return list(dict.fromkeys(res))
 
 
   @utils.cacheReturnValue
@@ -98,21 +113,17 @@ class Project:
 
   @utils.cacheReturnValue
   def allIncludedImgs(self):
-    res = []
-    for t in self.toplevel():
-      for i in t.imgs():
-        if i not in res:
-          res.append(i)
+    res = dict.fromkeys([i for t in self.toplevel()
+                             for i in t.imgs()])
     return sorted(res)
 
 
   @utils.cacheReturnValue
   def unusedIncludedImgs(self):
+    dirs = tuple(self.commonImageDirs())
+    included = set(self.allIncludedImgs())
     res = [f for f in self.allImgFiles()
-              if any([f.path.startswith(d) for d in self.commonImageDirs()])]
-    for i in self.allIncludedImgs():
-      if i in res:
-        res.remove(i)
+              if f.path.startswith(dirs) and f not in included]
     return sorted(res)
 
 
@@ -129,92 +140,112 @@ class Project:
 
   @utils.cacheReturnValue
   def allBibs(self):
-    res = []
-    for t in self.toplevel():
-      for b in t.bibs():
-        if b not in res:
-          res.append(b)
-    return res
+    res = dict.fromkeys([b for t in self.toplevel()
+                             for b in t.bibs()])
+    return list(res)
 
 
   @utils.cacheReturnValue
   def allCitesInBibs(self):
-    res = []
-    for t in self.toplevel():
-      for b in t.bibs():
-        for c in b.cites():
-          if c not in res:
-            res.append(c)
+    # citations hash by key, dict keeps the first citation of each key
+    res = dict.fromkeys([c for t in self.toplevel()
+                             for b in t.bibs()
+                               for c in b.cites()])
     return sorted(res)
 
 
   @utils.cacheReturnValue
   def allCitesInTex(self):
-    res = []
-    for t in self.toplevel():
-      for c in t.cites():
-        if c not in res:
-          res.append(c)
+    res = dict.fromkeys([c for t in self.toplevel()
+                             for c in t.cites()])
     return sorted(res)
 
 
   @utils.cacheReturnValue
   def unusedCites(self):
-    res = self.allCitesInBibs()
-    for c in self.allCitesInTex():
-      if c in res:
-        res.remove(c)
-    return sorted(res)
+    inTex = set(self.allCitesInTex())
+    return [c for c in self.allCitesInBibs() if c not in inTex]
 
 
   @utils.cacheReturnValue
   def missingCites(self):
-    res = []
-    for t in self.toplevel():
-      for c in t.missingCites():
-        if c.isHealthy and c not in res:
-          res.append(c)
-    return res
+    res = dict.fromkeys([c for t in self.toplevel()
+                             for c in t.missingCites()])
+    return list(res)
 
 
   @utils.cacheReturnValue
   def allRefs(self):
-    res = []
-    for t in self.toplevel():
-      for r in t.refs():
-        if r not in res:
-          res.append(r)
-    return sorted(res)
+    return sorted(set([r for t in self.toplevel()
+                           for r in t.refs()]))
 
 
   @utils.cacheReturnValue
   def allLabels(self):
-    res = []
+    return sorted(set([l for t in self.toplevel()
+                           for l in t.labels()]))
+
+
+  def _allTexFiles(self):
+    # toplevel files and all files included by them
+    res = {}
+    def add(t):
+      if t not in res:
+        res[t] = None
+        for i in t.includes():
+          add(i)
     for t in self.toplevel():
-      for l in t.labels():
-        if l not in res:
-          res.append(l)
-    return sorted(res)
+      add(t)
+    return list(res)
 
 
   @utils.cacheReturnValue
-  def lint(self):
-    # find all labels that are not referenced anywhere
-    unusedLabels = []
-    for l in self.allLabels():
-      if l not in self.allRefs():
-        if l not in unusedLabels:
-          unusedLabels.append(l)
-
-    # find all references for which no labels were found
-    brokenRefs = []
-    for r in self.allRefs():
-      if r not in self.allLabels():
-        if r not in brokenRefs:
-          brokenRefs.append(r)
+  def lint(self, changedLines=None, jobs=1):
+    # find all labels that are not referenced anywhere and all references
+    # for which no labels were found, labels and references of included
+    # files count for the whole project
+    files = self._allTexFiles()
+    labels = set([l for t in files for l in t.labels()])
+    refs = set([r for t in files for r in t.refs()])
+    unusedLabels = labels-refs
+    brokenRefs = refs-labels
+
+    # with more than one job files are checked in worker processes ahead of
+    # time, prompts and output stay in this process and in the same order
+    executor = None
+    if jobs > 1:
+      executor = utils.processPool(jobs)
+      self._prefetchLint(executor, changedLines)
 
     # go through all files in project line by line and lint
-    visited = []
+    try:
+      visited = set()
+      for t in self.toplevel():
+        for l in t.lint(visited=visited, unusedLabels=unusedLabels,
+                        brokenRefs=brokenRefs, changedLines=changedLines):
+          yield l
+    finally:
+      if executor is not None:
+        executor.shutdown(cancel_futures=True)
+
+
+  def _prefetchLint(self, executor, changedLines):
+    # submit files in the order they are linted in, see TexFile.lint()
+    visited = set()
+    def prefetch(t):
+      for i in t.includes():
+        if i not in visited:
+          visited.add(i)
+          prefetch(i)
+      for b in t.bibs():
+        if b not in visited:
+          visited.add(b)
+          b.prefetchLint(executor, changedLines)
+      t.prefetchLint(executor)
+
     for t in self.toplevel():
-      for l in t.lint(visited=visited, unusedLabels=unusedLabels, brokenRefs=brokenRefs):
-        yield l
+      # bibliographies of included files depend on the ones of the toplevel
+      t.bibs()
+      if t not in visited:
+        visited.add(t)
+        prefetch(t)
@@ -4,7 +4,10 @@ def main(args):
   proj = detectProj(args)
   if proj is None:
     return
+  run(args, proj)
 
+
+def run(args, proj):
   unused = proj.unusedCites()
   if unused:
     io.info('detected unused citations:', *sorted(unused))
@@ -131,7 +134,8 @@ def main(args):
         # remove unused citations if requested
         if unused and args.clean:
           if io.conf(f'remove all unused entries from bib file {bib.path}?', default=True):
-            newCites = [c for c in newCites if c not in unused]
+            _unused = set(unused)
+            newCites = [c for c in newCites if c not in _unused]
 
         # apply sorting scheme if requested
         if sortKey:
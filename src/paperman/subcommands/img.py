@@ -1,3 +1,4 @@
+from .. import parser
 from .common import *
 
 p = lambda d: os.path.realpath(os.path.expanduser(d))
@@ -14,7 +15,10 @@ def main(args):
   proj = detectProj(args)
   if proj is None:
     return
+  run(args, proj)
 
+
+def run(args, proj):
   unused = proj.unusedIncludedImgs()
   if unused:
     io.info('detected unused image files:', *sorted(unused))
@@ -30,6 +34,7 @@ def main(args):
         io.info(f'{stripBaseDir(absPath)} -> {stripBaseDir(absMoveTo)}')
         os.makedirs(os.path.dirname(absMoveTo), exist_ok=True)
         shutil.move(absPath, absMoveTo)
+        parser.img.forgetListing(os.path.dirname(absPath))
     io.info('all done.')
 
   missing = proj.missingIncludedImgs()
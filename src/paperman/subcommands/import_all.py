@@ -0,0 +1,22 @@
+from . import inp
+from . import img
+from . import bib
+from .common import *
+
+
+def main(args):
+  # all steps share one project, such that the project tree is walked and
+  # tex files are parsed only once, search paths are indexed once by finder
+  try:
+    proj = detectProj(args,
+                      enableIncludeImport=True,
+                      raiseOnIncludeNotFound=inp.IncludeMissing)
+  except inp.IncludeMissing as e:
+    inp.reportMissing(args, e)
+    return
+  if proj is None:
+    return
+
+  for cmd in (inp, img, bib):
+    io.verb(f'running import step {cmd.__name__}')
+    cmd.run(args, proj)
@@ -0,0 +1,24 @@
+import time
+
+from .. import finder
+from .. import fsindex
+from .common import *
+
+
+def main(args):
+  if not cfg.get('index', 'enabled'):
+    io.info('search path index is disabled in config (index.enabled)')
+    return
+
+  if args.status:
+    for basePath in finder.searchBasePaths():
+      dirs, files, refreshed = fsindex.status(basePath)
+      age = ('never refreshed' if refreshed is None
+               else f'refreshed {(time.time()-refreshed)/60:.0f} minutes ago')
+      io.info(f'{basePath}: {dirs} directories, {files} files, {age}')
+    return
+
+  t0 = time.time()
+  finder.refreshIndex(rebuild=args.rebuild)
+  io.info(f'{"rebuilt" if args.rebuild else "refreshed"} search path index '
+          f'in {time.time()-t0:.1f}s')
@@ -5,6 +5,29 @@ class IncludeMissing(RuntimeError):
 
 def main(args):
   enableImport = hasattr(args, 'import') and getattr(args, 'import')
+  try:
+    proj = detectProj(args,
+                      enableIncludeImport=enableImport,
+                      raiseOnIncludeNotFound=IncludeMissing)
+  except IncludeMissing as e:
+    reportMissing(args, e)
+    return
+  if proj is None:
+    return
+  run(args, proj)
+
+
+def reportMissing(args, e):
+  if hasattr(args, 'import') and getattr(args, 'import'):
+    io.err(r'failed to import \input{} file:',
+           str(e))
+  else:
+    io.info(r'imported missing \input{} file:',
+            str(e))
+
+
+def run(args, proj):
+  enableImport = hasattr(args, 'import') and getattr(args, 'import')
 
   # check if image search is configured
   if enableImport:
@@ -13,21 +36,11 @@ def main(args):
       return
 
   try:
-    proj = detectProj(args,
-                      enableIncludeImport=enableImport,
-                      raiseOnIncludeNotFound=IncludeMissing)
-    if proj is None:
-      return
     for t in proj.toplevel():
       t.recurseThroughIncludes()
 
   except IncludeMissing as e:
-    if enableImport:
-      io.err(r'failed to import \input{} file:',
-             str(e))
-    else:
-      io.info(r'imported missing \input{} file:',
-              str(e))
+    reportMissing(args, e)
 
   else:
     io.info(r'all files imported by \input{} exist')
@@ -2,9 +2,43 @@ import subprocess
 
 from .. import utils
 from .. import parser
+from .. import walker
 from . common import *
 
 
+# parse a single library bib file, runs in worker processes and returns
+# everything main() needs to know about the file
+def _scanBibFile(path, search, scan):
+  try:
+    if search:
+      c = next(parser.BibFile(path).iterCites())
+    else:
+      c = parser.BibFile(path).cites()[0]
+  except Exception:
+    return path, None
+
+  res = {}
+  if search:
+    res['match'] = all([any([s.lower() in v.lower()
+                                for v in [c.key] + list(c.fields.values())])
+                                    for s in search])
+  if scan:
+    res['key'] = c.key
+    res['compareAuthorTitle'] = c.compareAuthorTitle()
+    res['paired'] = os.path.exists('.'.join(path.split('.')[:-1])+'.pdf')
+  return path, res
+
+
+# parse bib files in parallel, results are returned in order of paths
+def _scanBibFiles(paths, search, scan, jobs):
+  if jobs <= 1 or len(paths) < 2:
+    return [_scanBibFile(p, search, scan) for p in paths]
+  n = len(paths)
+  with utils.processPool(jobs) as executor:
+    return list(executor.map(_scanBibFile, paths, [search]*n, [scan]*n,
+                             chunksize=max(1, min(256, n//(4*jobs)))))
+
+
 def main(args):
   # check of library path is set
   libraryPath = os.path.expanduser(cfg.get('library_path'))
@@ -32,10 +66,12 @@ def main(args):
   unpairedFiles = []
   invalidBibFiles = []
   invalidPdfFiles = []
+  bibPaths = []
+  walkOrder = {}
 
   # walk through library
   hasWarnedDepth = False
-  for root, dirs, files in os.walk(libraryPath, topdown=True):
+  for root, dirs, files in walker.walk(libraryPath):
     # skip annotated folder
     if os.path.relpath(root, libraryPath).startswith('annotated'):
       continue
@@ -60,40 +96,11 @@ def main(args):
     # loop through files in dir
     for f in files:
       path = os.path.join(root, f)
+      walkOrder[path] = len(walkOrder)
       if any([f.lower().endswith('.'+e) for e in cfg.get('bibtex_extensions')]):
-        # if bibfile and search is enabled, check of matching
-        if search:
-          try:
-            c = parser.BibFile(path).cites()[0]
-          except Exception:
-            io.verb(f'skipping invalid library entry {path}')
-          else:
-            if all([any([s.lower() in v.lower()
-                                  for v in [c.key] + list(c.fields.values())])
-                                      for s in search]):
-              matches.append(path)
-
-        # if scan is enabled, check if file is successfully parsed
-        if scan:
-          try:
-            c = parser.BibFile(path).cites()[0]
-          except Exception:
-            invalidBibFiles.append(path)
-          else:
-            # add to duplicate keys dict
-            if c.key not in foundDuplicates:
-              foundDuplicates[c.key] = []
-            foundDuplicates[c.key].append(path)
-
-            # add to true duplicates dict
-            if c.compareAuthorTitle() not in foundTrueDuplicates:
-              foundTrueDuplicates[c.compareAuthorTitle()] = []
-            foundTrueDuplicates[c.compareAuthorTitle()].append(path)
-
-            if os.path.exists('.'.join(path.split('.')[:-1])+'.pdf'):
-              healthyCount += 0.5
-            else:
-              unpairedFiles.append(path)
+        # bib files are parsed in parallel after walking the library
+        if search or scan:
+          bibPaths.append(path)
 
       elif f.lower().endswith('.pdf'):
         # if pdf file and fulltext search enabled, check if matching
@@ -135,6 +142,41 @@ def main(args):
             else:
               unpairedFiles.append(path)
 
+  # parse bib files and merge results in walk order
+  jobs = args.jobs or os.cpu_count() or 1
+  io.verb(f'parsing {len(bibPaths)} library bib files using {jobs} processes')
+  for path, res in _scanBibFiles(bibPaths, search, scan, jobs):
+    # if bibfile and search is enabled, check of matching
+    if search:
+      if res is None:
+        io.verb(f'skipping invalid library entry {path}')
+      elif res['match']:
+        matches.append(path)
+
+    # if scan is enabled, check if file is successfully parsed
+    if scan:
+      if res is None:
+        invalidBibFiles.append(path)
+      else:
+        # add to duplicate keys dict
+        if res['key'] not in foundDuplicates:
+          foundDuplicates[res['key']] = []
+        foundDuplicates[res['key']].append(path)
+
+        # add to true duplicates dict
+        if res['compareAuthorTitle'] not in foundTrueDuplicates:
+          foundTrueDuplicates[res['compareAuthorTitle']] = []
+        foundTrueDuplicates[res['compareAuthorTitle']].append(path)
+
+        if res['paired']:
+          healthyCount += 0.5
+        else:
+          unpairedFiles.append(path)
+
+  # report unpaired pdf and bib files in walk order, as if all were
+  # checked while walking
+  unpairedFiles.sort(key=walkOrder.get)
+
   if search or fulltextSearch:
     if not matches:
       io.info('no matches')
@@ -147,10 +189,10 @@ def main(args):
           break
       if args.long:
         if bibPath:
-          io.raw(parser.BibFile(bibPath).cites()[0].toString())
+          io.raw(next(parser.BibFile(bibPath).iterCites()).toString())
       elif args.key:
         if bibPath:
-          io.info(parser.BibFile(bibPath).cites()[0].key)
+          io.info(parser.BibFile(bibPath, lazy=True).cites()[0].key)
       else:
         io.info(m)
 
@@ -1,12 +1,68 @@
+import os
+import re
+import codecs
+import subprocess
+
 from .common import *
 
+
+def _git(*cmd):
+  r = subprocess.run(['git', *cmd], capture_output=True)
+  if r.returncode:
+    raise RuntimeError(f'"git {" ".join(cmd)}" failed:\n'
+                       +r.stdout.decode()+'\n'+r.stderr.decode())
+  return r.stdout.decode()
+
+
+def _unquote(path):
+  # git quotes paths containing quotes, backslashes or control characters
+  if path.startswith('"'):
+    path = codecs.escape_decode(path[1:-1])[0].decode()
+  return path
+
+
+def changedLines(rev):
+  # return files changed in the working tree since git revision rev, mapped
+  # to the set of their added or modified lines, or None for untracked files
+  root = _git('rev-parse', '--show-toplevel').strip()
+  res = {}
+  path = None
+  for l in _git('-c', 'core.quotePath=false', 'diff', '-U0', '--no-color', '--no-ext-diff',
+                '--src-prefix=a/', '--dst-prefix=b/', rev, '--').splitlines():
+    if l.startswith('+++ '):
+      # unquoted paths containing spaces are terminated by a tab
+      path = _unquote(l[4:].rstrip('\t'))
+      path = (None if path == '/dev/null'
+                   else os.path.realpath(os.path.join(root, path[2:])))
+      if path:
+        res.setdefault(path, set())
+    elif path and (m:=re.match(r'@@ -\S+ \+(\d+)(?:,(\d+))? @@', l)):
+      start, n = int(m.group(1)), int(m.group(2) or 1)
+      res[path].update(range(start, start+n))
+
+  for f in _git('ls-files', '--others', '--exclude-standard', '-z',
+                '--full-name', root).split('\0'):
+    if f:
+      res[os.path.realpath(os.path.join(root, f))] = None
+  return res
+
+
 def main(args):
   proj = detectProj(args)
   if proj is None:
     return
 
+  changed = None
+  if args.changed_since:
+    changed = changedLines(args.changed_since)
+    io.verb(f'linting {len(changed)} files changed since '
+            f'{args.changed_since}')
+
+  jobs = args.jobs or os.cpu_count() or 1
+  io.verb(f'linting using {jobs} processes')
+
   allFine = True
-  for l in proj.lint():
+  for l in proj.lint(changedLines=changed, jobs=jobs):
     #io.dbg(f'proj.lint yielded {l}')
     f, ln, msg = l
     io.info(f'in file {f}, line {ln}:', msg)
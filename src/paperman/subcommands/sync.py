@@ -2,6 +2,7 @@ import subprocess
 import shutil
 import time
 
+from .. import walker
 from .common import *
 
 def main(args):
@@ -41,7 +42,7 @@ def main(args):
   libPath = os.path.expanduser(cfg.get('library_path'))
   additionalPaths = [os.path.expanduser(p) for p in cfg.get('library_sync_additional_paths')]
   for _path in [libPath]+additionalPaths:
-    for root, dirs, files in os.walk(_path, topdown=True):
+    for root, dirs, files in walker.walk(_path):
       dirs[:] = [d for d in dirs if not d.startswith('.')]
       files[:] = [f for f in files if not f.startswith('.')]
 
@@ -69,7 +70,7 @@ def main(args):
               nothingDone = False
 
   # copying files that changed on the device to annotated folder
-  for root, dirs, files in os.walk(syncPath, topdown=True):
+  for root, dirs, files in walker.walk(syncPath):
     dirs[:] = [d for d in dirs if not d.startswith('.')]
     files[:] = [f for f in files if not f.startswith('.')]
 
@@ -1,9 +1,11 @@
 import time
 import traceback
 import os
+import concurrent.futures
 
 from . import io
 from . import cfg
+from . import cache
 
 
 def uniquePath(path):
@@ -60,3 +62,16 @@ def replaceSuffix(path, suff):
   if len(suff)>0 and not suff.startswith('.'):
     suff = '.'+suff
   return os.path.join(os.path.dirname(path), fname+suff)
+
+
+def processPool(jobs):
+  # process pool whose workers use the config and cache directory of this
+  # process, also if workers are spawned instead of forked
+  return concurrent.futures.ProcessPoolExecutor(
+      max_workers=jobs, initializer=_initWorker,
+      initargs=(cfg.snapshot(), cache._CACHE_DIR))
+
+
+def _initWorker(cfgSnapshot, cacheDir):
+  cfg.useSnapshot(cfgSnapshot)
+  cache._CACHE_DIR = cacheDir
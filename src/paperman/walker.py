@@ -0,0 +1,119 @@
+import os
+import threading
+import concurrent.futures
+
+from . import cfg
+
+# directory walker that lists directories in a thread pool ahead of time,
+# which hides the latency of network filesystems, results are yielded in the
+# same order as os.walk(top, topdown=True) does
+
+# maximum number of directories that are listed ahead of the walk
+_MAX_PREFETCH        = 256
+
+
+def listdir(path):
+  # list directory like os.walk does, directories that are links are
+  # reported but not recursed into
+  dirs, links, files = [], [], []
+  with os.scandir(path) as it:
+    for entry in it:
+      try:
+        isDir = entry.is_dir()
+      except OSError:
+        isDir = False
+      if isDir:
+        dirs.append(entry.name)
+        try:
+          if entry.is_symlink():
+            links.append(entry.name)
+        except OSError:
+          pass
+      else:
+        files.append(entry.name)
+  return dirs, links, files
+
+
+def _isNotHidden(name):
+  return not name.startswith('.')
+
+
+def walk(top, listdir=listdir, prefetch=_isNotHidden):
+  # drop-in replacement for os.walk(top, topdown=True), the caller may remove
+  # entries from dirs to prune the walk, listdir(path) has to return lists
+  # of subdirectories, links to directories and files and may raise OSError
+  # for directories that cannot be listed, which are skipped, subdirectories
+  # are only listed ahead of time if prefetch(name) is true
+  threads = cfg.get('walk_threads')
+  if threads <= 1:
+    stack = [top]
+    while stack:
+      root = stack.pop()
+      try:
+        dirs, links, files = listdir(root)
+      except OSError:
+        continue
+      yield root, dirs, files
+      links = set(links)
+      stack.extend([os.path.join(root, d) for d in reversed(dirs)
+                                               if d not in links])
+    return
+
+  futures = {}
+  lock = threading.Lock()
+  executor = concurrent.futures.ThreadPoolExecutor(max_workers=threads)
+
+  def submit(path, ahead):
+    # must be called with lock held
+    if path not in futures and len(futures) < _MAX_PREFETCH:
+      futures[path] = executor.submit(listAhead, path, ahead)
+
+  def listAhead(path, ahead):
+    # list directory and, if ahead is set, its subdirectories as well, such
+    # that chains of single subdirectories do not serialize the walk
+    res = listdir(path)
+    if ahead:
+      dirs, links, _ = res
+      with lock:
+        for d in dirs:
+          if d not in links and prefetch(d):
+            submit(os.path.join(path, d), False)
+    return res
+
+  try:
+    stack = [top]
+    while stack:
+      root = stack.pop()
+      with lock:
+        future = futures.pop(root, None)
+      try:
+        if future is None:
+          dirs, links, files = listdir(root)
+        else:
+          dirs, links, files = future.result()
+      except OSError:
+        continue
+
+      allDirs = list(dirs)
+      yield root, dirs, files
+
+      # forget directories listed ahead of time that were pruned by the
+      # caller
+      links = set(links)
+      with lock:
+        for d in set(allDirs)-set(dirs):
+          f = futures.pop(os.path.join(root, d), None)
+          if f is not None:
+            f.cancel()
+
+      # push remaining subdirectories in order of os.walk and list the ones
+      # that are visited next in the background
+      stack.extend([os.path.join(root, d) for d in reversed(dirs)
+                                               if d not in links])
+      with lock:
+        for path in reversed(stack[-_MAX_PREFETCH:]):
+          if len(futures) >= _MAX_PREFETCH:
+            break
+          submit(path, True)
+  finally:
+    executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,239 @@
+import unittest
+import tempfile
+import random
+import os
+import sys
+
+from helpers import IsolatedTestCase
+
+EXAMPLE = r'''
+some text before the first entry, @comment{ignored, {braces\}
+
+@article{first_key,
+  author = {Muster, Max and Beispiel, Moritz},
+  title = {{Nested} braces in a {T}itle},
+  journal = "Quoted {Journal} Name",
+  year = 2021,
+  month = jan,
+  note = { leading and trailing whitespace },
+  pages = {1-10}
+}
+
+@Book{second:key,
+  title = {Escaped \{ braces \} and \"quotes\" and \\ backslashes},
+  Publisher = "A, B and C",
+  abstract = {A very long abstract, with commas, "quotes" and {nested {braces}}
+              spanning multiple lines},
+}
+
+@misc{empty}
+@misc{trailing_comma,}
+@misc{
+newline_key,
+  url={https://example.com/a,b}}
+'''
+
+MALFORMED = [
+  '@article{key, title = "un}matched"}',
+  '@article{key, title = {unmatched}',
+  '@article{bad key, title = {x}}',
+  '@article{key, ti tle = {x}}',
+  '@article{key, title = {x}, title = {y}}',
+  '@art1cle{key, title = {x}}',
+  '@article{key, title = "x}',
+  '@article{key, title = {x},, year = 2000}',
+  '@article{key, title = {x} \\}',
+  '@article{, title = {x}}',
+]
+
+
+class TestBibParser(IsolatedTestCase):
+  def _bib(self, content):
+    from paperman.parser import BibFile
+    b = BibFile('')
+    b._content = content
+    return b
+
+  def _parse(self, content, method):
+    b = self._bib(content)
+    try:
+      cites = getattr(b, method)()
+    except RuntimeError as e:
+      return str(e)
+    return [(c.key, c.section, c.fields, c.fieldsParseInfo) for c in cites]
+
+  def _crossCheck(self, content):
+    from paperman.parser import bib
+    reference = self._parse(content, 'citesReference')
+    try:
+      fast = self._parse(content, '_citesFast')
+    except bib._ReferenceFallback:
+      fast = None
+    else:
+      self.assertEqual(fast, reference)
+    self.assertEqual(self._parse(content, 'cites'), reference)
+    return fast, reference
+
+  def test_example(self):
+    fast, reference = self._crossCheck(EXAMPLE)
+    self.assertEqual(fast, reference)
+    self.assertEqual([c[0] for c in reference],
+                     ['first_key', 'second:key', 'empty', 'trailing_comma',
+                      'newline_key'])
+
+  def test_malformed(self):
+    for content in MALFORMED:
+      fast, reference = self._crossCheck(content)
+      self.assertIs(fast, None)
+      self.assertIn('parsing error', reference)
+
+  def test_lazy(self):
+    b = self._bib(EXAMPLE)
+    b.lazy = True
+    lazy = b.cites()
+    self.assertTrue(all([c._lazy is not None for c in lazy[:2]]))
+    self.assertEqual([(c.key, c.section, c.fields, c.fieldsParseInfo)
+                          for c in lazy],
+                     self._parse(EXAMPLE, 'citesReference'))
+
+  def test_lazy_error(self):
+    content = EXAMPLE.replace('Publisher', 'Pub lisher')
+    b = self._bib(content)
+    b.lazy = True
+    cites = b.cites()
+    self.assertEqual(cites[0]['year'], '2021')
+    with self.assertRaises(RuntimeError) as e:
+      cites[1].fields
+    self.assertEqual(str(e.exception),
+                     self._parse(content, 'citesReference'))
+
+  def test_index(self):
+    from paperman.parser import Cite
+    b = self._bib(EXAMPLE+'@misc{empty, note = {duplicate}}')
+    index = b.index()
+    self.assertEqual(list(index), ['first_key', 'second:key', 'empty',
+                                   'trailing_comma', 'newline_key'])
+    self.assertIs(index['empty'], b.cites()[2])
+    self.assertTrue(Cite('empty', [b]).exists())
+    self.assertFalse(Cite('missing', [b]).exists())
+    self.assertEqual(len({Cite('empty'), *b.cites()}), 5)
+
+  def test_cache(self):
+    from paperman import cache
+    from paperman.parser import BibFile, bib
+    path = os.path.join(self._dir.name, 'example.bib')
+    with open(path, 'w') as f:
+      f.write(EXAMPLE)
+    os.utime(path, (0, 0))
+    key = cache.fileKey(path, bib._PARSER_VERSION)
+
+    # lazy parse stores spans only, eager parse completes cache
+    self.assertEqual(len(BibFile(path, lazy=True).cites()), 5)
+    self.assertFalse(all([e[-1] for e in cache.load('bib', key[0], key)]))
+    expected = self._parse(EXAMPLE, 'citesReference')
+    cites = BibFile(path).cites()
+    self.assertEqual([(c.key, c.section, c.fields, c.fieldsParseInfo)
+                          for c in cites], expected)
+    self.assertTrue(all([e[-1] for e in cache.load('bib', key[0], key)]))
+    cites = BibFile(path).cites()
+    self.assertEqual([(c.key, c.section, c.fields, c.fieldsParseInfo)
+                          for c in cites], expected)
+
+    # modifying the file invalidates the cache
+    with open(path, 'a') as f:
+      f.write('@misc{appended}')
+    os.utime(path, (1, 1))
+    self.assertEqual(len(BibFile(path).cites()), 6)
+
+  def test_iter_cites(self):
+    from paperman.parser import BibFile, bib
+    _chunkSize, bib._STREAM_CHUNK_SIZE = bib._STREAM_CHUNK_SIZE, 7
+    try:
+      with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, 'example.bib')
+        # files usually end with a newline, which is not part of content()
+        for content in [EXAMPLE]+MALFORMED+[m+'\n' for m in MALFORMED]:
+          with open(path, 'w') as f:
+            f.write(content)
+          try:
+            res = [(c.key, c.section, c.fields, c.fieldsParseInfo, c.span)
+                        for c in BibFile(path).iterCites()]
+          except RuntimeError as e:
+            res = str(e)
+          try:
+            expected = [(c.key, c.section, c.fields, c.fieldsParseInfo)
+                            for c in BibFile(path).citesReference()]
+          except RuntimeError as e:
+            self.assertEqual(res, str(e))
+          else:
+            self.assertEqual([r[:-1] for r in res], expected)
+            self.assertEqual([r[-1] for r in res],
+                             [c.span for c in BibFile(path).cites()])
+    finally:
+      bib._STREAM_CHUNK_SIZE = _chunkSize
+
+  def test_set_and_add_cites(self):
+    from paperman.parser import BibFile, Cite
+    content = ('% header comment\n'
+               '@article{a,\n  title = {First},\n  year = {2000}\n}\n\n'
+               '@misc{b,\n  note = "Second entry"}\n'
+               '@book{c,\n  title = {Third},\n  pages = {1--3}\n}')
+    state = lambda b: [(c.key, c.section, c.fields, c.fieldsParseInfo, c.span)
+                           for c in b.cites()]
+    with tempfile.TemporaryDirectory() as d:
+      path = os.path.join(d, 'example.bib')
+      with open(path, 'w') as f:
+        f.write(content)
+      bib = BibFile(path)
+      cites = bib.cites()
+      c = cites[2]
+      bib.setCites([cites[2], cites[0]])
+      self.assertIs(bib.cites()[0], c)
+      self.assertEqual(state(bib), state(BibFile(path)))
+      self.assertEqual([c.key for c in bib.cites()], ['c', 'a'])
+
+      # unchanged citations do not touch the file
+      mtime = os.stat(path).st_mtime_ns
+      bib.setCites(bib.cites())
+      self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+
+      new = Cite('d', section='misc', fields={'note': '{New}'})
+      new.fieldsParseInfo = {'note': ((0,), (4,))}
+      bib.addCites([new])
+      self.assertEqual(state(bib), state(BibFile(path)))
+      self.assertEqual(bib.index()['d']['note'], 'New')
+
+  def test_iter_cites_mutations(self):
+    from paperman.parser import BibFile
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as d:
+      path = os.path.join(d, 'example.bib')
+      for _ in range(100):
+        content = list(EXAMPLE)
+        for _ in range(rng.randint(1, 3)):
+          i = rng.randrange(len(content))
+          content[i] = rng.choice('{}",=@\\ \na')
+        with open(path, 'w') as f:
+          f.write(''.join(content))
+        try:
+          res = [c.key for c in BibFile(path).iterCites()]
+        except RuntimeError as e:
+          res = str(e)
+        try:
+          expected = [c.key for c in BibFile(path).citesReference()]
+        except RuntimeError as e:
+          expected = str(e)
+        self.assertEqual(res, expected)
+
+  def test_random_mutations(self):
+    rng = random.Random(0)
+    for _ in range(300):
+      content = list(EXAMPLE)
+      for _ in range(rng.randint(1, 3)):
+        i = rng.randrange(len(content))
+        content[i] = rng.choice('{}",=@\\ \na')
+      self._crossCheck(''.join(content))
+
+
+if __name__ == '__main__':
+  unittest.main()
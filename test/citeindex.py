@@ -0,0 +1,97 @@
+import unittest
+import time
+import os
+
+from helpers import IsolatedTestCase
+
+class TestCiteIndex(IsolatedTestCase):
+  # persistent and in memory citation index have to find the same entries,
+  # changed bib files have to be parsed again
+  def setUp(self):
+    super().setUp()
+    self._config(True)
+    self._a = self._write('a.bib', '@article{alpha, title={Alpha}}\n\n'
+                                   '@book{beta, title={Beta}}\n')
+    self._b = self._write('b.bib', '@misc{beta, title={Other Beta}}\n')
+
+  def _config(self, enabled):
+    self._setConfig({'index': {'enabled': enabled}})
+
+  def _write(self, name, content, age=60):
+    # files that changed just now are parsed again on every run
+    path = os.path.join(self._dir.name, name)
+    with open(path, 'w') as f:
+      f.write(content)
+    t = time.time()-age
+    os.utime(path, (t, t))
+    return path
+
+  def _lookup(self, key):
+    from paperman import citeindex
+    index = citeindex.CiteIndex([(self._a, 0), (self._b, 1)])
+    return sorted([(priority, os.path.basename(path),
+                    index.cite(entry).fields['title'].strip('{}'))
+                      for priority, path, entry in index.entries(key)])
+
+  def test_entries(self):
+    for enabled in (True, False):
+      self._config(enabled)
+      self.assertEqual(self._lookup('alpha'), [(0, 'a.bib', 'Alpha')])
+      self.assertEqual(self._lookup('beta'), [(0, 'a.bib', 'Beta'),
+                                              (1, 'b.bib', 'Other Beta')])
+      self.assertEqual(self._lookup('gamma'), [])
+
+  def test_changed(self):
+    # changes of size or modification time are noticed
+    self.assertEqual(len(self._lookup('beta')), 2)
+    self._write('b.bib', '@misc{gamma, title={Gamma}}\n')
+    self.assertEqual(self._lookup('beta'), [(0, 'a.bib', 'Beta')])
+    self.assertEqual(self._lookup('gamma'), [(1, 'b.bib', 'Gamma')])
+    self._write('b.bib', '@misc{delta, title={Gamma}}\n', age=30)
+    self.assertEqual(self._lookup('gamma'), [])
+    self.assertEqual(self._lookup('delta'), [(1, 'b.bib', 'Gamma')])
+
+  def test_moved(self):
+    # entries are parsed at their stored location, which has to be checked
+    from paperman import citeindex
+    index = citeindex.CiteIndex([(self._a, 0)])
+    entries = index.entries('beta')
+    self._write('a.bib', '@book{beta, title={Beta}}\n')
+    with self.assertRaises(RuntimeError):
+      citeindex.CiteIndex([(self._a, 0)]).cite(entries[0][2])
+
+  def test_removed(self):
+    # entries of deleted files are removed, also if the files are still
+    # listed or not listed anymore
+    from paperman import citeindex
+    self._lookup('beta')
+    os.remove(self._b)
+    index = citeindex.CiteIndex([(self._a, 0), (self._b, 1)])
+    self.assertEqual([(p, path) for p, path, _ in index.entries('beta')],
+                     [(0, self._a)])
+    os.remove(self._a)
+    citeindex.CiteIndex([])
+    db = citeindex._connect()
+    self.assertEqual(db.execute('SELECT COUNT(*) FROM cites').fetchone(), (0,))
+    self.assertEqual(db.execute('SELECT COUNT(*) FROM files').fetchone(), (0,))
+
+  def test_files(self):
+    # only entries of the given files are returned
+    from paperman import citeindex
+    self._lookup('beta')
+    index = citeindex.CiteIndex([(self._b, 3)])
+    self.assertEqual([(p, path) for p, path, _ in index.entries('beta')],
+                     [(3, self._b)])
+    self.assertEqual(index.entries('alpha'), [])
+
+  def test_clear(self):
+    from paperman import citeindex
+    self._lookup('beta')
+    citeindex.clear()
+    db = citeindex._connect()
+    self.assertEqual(db.execute('SELECT COUNT(*) FROM cites').fetchone(), (0,))
+    self.assertEqual(len(self._lookup('beta')), 2)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import glob
+import fnmatch
+import time
+import os
+
+from helpers import IsolatedTestCase
+
+class TestFinder(IsolatedTestCase):
+  # searches in the file index have to find the same files as a walk
+  CONFIG = {'index': {'enabled': True}}
+
+  def setUp(self):
+    super().setUp()
+    self._reset()
+    self.addCleanup(self._reset)
+    self._top = os.path.join(self._dir.name, 'top')
+    for p in ('a/img/fig.png', 'a/img/fig.pdf', 'a/img/fig.v2.png',
+              'a/refs.bib', 'b/c/img/plot.jpg', 'b/c/refs.bib',
+              'b/other.bib.bak', 'x.tex', 'img/fig.png'):
+      self._touch(p)
+
+  def _reset(self):
+    from paperman import finder
+    finder._INDICES.clear()
+    finder._REFRESHED.clear()
+    finder._STATS.clear()
+
+  def _touch(self, path, age=60):
+    path = os.path.join(self._top, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'w').close()
+    # directories that changed just now are not stored in the index
+    t = time.time()-age
+    while len(path) >= len(self._top):
+      os.utime(path, (t, t))
+      path = os.path.dirname(path)
+
+  def test_candidates(self):
+    from paperman import finder
+    index = finder._FileIndex(self._top)
+    self.assertEqual(sorted(index.files),
+                     sorted(glob.glob(self._top+'/**/*.*', recursive=True)))
+    rel = lambda files: sorted([os.path.relpath(f, self._top) for f in files])
+    self.assertEqual(rel(index.candidates('fig.png')),
+                     ['a/img/fig.png', 'img/fig.png'])
+    self.assertEqual(rel(index.candidates('fig.*')),
+                     ['a/img/fig.pdf', 'a/img/fig.png', 'a/img/fig.v2.png',
+                      'img/fig.png'])
+    self.assertEqual(rel(index.candidates('*.bib')),
+                     ['a/refs.bib', 'b/c/refs.bib'])
+    self.assertEqual(index.candidates('f?g.*'), index.files)
+    self.assertEqual(index.candidates('missing.png'), [])
+
+  def test_fast_glob(self):
+    # patterns are matched against full paths by fnmatch
+    from paperman import finder
+    files = [os.path.join(root, f) for root, _, files in os.walk(self._top)
+                                   for f in files]
+    for pattern in ('**/img/fig.*', '**/*.bib', '*/img/*', 'b/**/*.jpg',
+                    '*/x.tex', '**/fig.v2.*', '**/missing.*'):
+      path = os.path.join(self._top, pattern)
+      self.assertEqual(sorted(finder._fastGlob(path)),
+                       sorted(fnmatch.filter(files, path)), pattern)
+    # like in search paths of the config, '**/' needs at least one directory
+    self.assertEqual(len(finder._fastGlob(self._top+'/**/img/fig.*')), 3)
+    # one walk per base path and run
+    self.assertEqual(list(finder._INDICES), [self._top+'/', self._top+'/b/'])
+
+  def test_new_files(self):
+    # files added after the index was stored are found by a refresh, which
+    # happens at most once per run and only if nothing was found
+    from paperman import finder
+    path = os.path.join(self._top, '**', 'new.*')
+    self.assertEqual(finder._fastGlob(path), [])
+    self._reset()
+    self._touch('a/img/new.png')
+    self._touch('b/new.png')
+    self.assertEqual(len(finder._fastGlob(path)), 2)
+    self._touch('b/c/new.png')
+    self.assertEqual(len(finder._fastGlob(path)), 2)
+    # the refreshed index is trusted for index.max_age_minutes
+    self._reset()
+    self.assertEqual(len(finder._fastGlob(path)), 2)
+    self._reset()
+    self._setConfig({'index': {'enabled': True, 'max_age_minutes': 0}})
+    self.assertEqual(len(finder._fastGlob(path)), 3)
+
+  def test_removed_files(self):
+    from paperman import finder
+    path = os.path.join(self._top, '**', 'fig.png')
+    self.assertEqual(len(finder._fastGlob(path)), 2)
+    self._reset()
+    os.remove(os.path.join(self._top, 'img', 'fig.png'))
+    self.assertEqual(finder._fastGlob(path),
+                     [os.path.join(self._top, 'a', 'img', 'fig.png')])
+
+
+  def test_ignore(self):
+    # ignore files apply to their directory and below, patterns of the
+    # config apply to the whole search path
+    from paperman import finder
+    self._setConfig({'index': {'enabled': True},
+                  'search_exclude_patterns': ['c/', '*.bak']})
+    for p in ('.hidden/h.png', 'a/node_modules/n.png', 'a/img/tmp/t.png',
+              'b/d/keep.png', 'b/d/drop.png'):
+      self._touch(p)
+    with open(os.path.join(self._top, '.papermanignore'), 'w') as f:
+      f.write('# comment\n/x.tex\n**/tmp/\n')
+    with open(os.path.join(self._top, 'b', '.papermanignore'), 'w') as f:
+      f.write('*.png\n!keep.png\n')
+    files = sorted([os.path.relpath(p, self._top)
+                      for _, p in finder._walkFiles(self._top)])
+    self.assertEqual(files, ['.papermanignore', 'a/img/fig.pdf',
+                             'a/img/fig.png', 'a/img/fig.v2.png',
+                             'a/node_modules/n.png', 'a/refs.bib',
+                             'b/.papermanignore', 'b/d/keep.png',
+                             'img/fig.png'])
+    # the default patterns are replaced by the config
+    self._setConfig({'index': {'enabled': True}})
+    files = [os.path.relpath(p, self._top)
+                for _, p in finder._walkFiles(self._top)]
+    self.assertIn('b/c/refs.bib', files)
+    self.assertIn('b/other.bib.bak', files)
+    self.assertNotIn('a/node_modules/n.png', files)
+    self.assertNotIn('a/img/tmp/t.png', files)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import time
+import os
+from unittest import mock
+
+from helpers import IsolatedTestCase
+
+class TestFsIndex(IsolatedTestCase):
+  # stored directory listings have to be equal to the ones of os.walk as
+  # long as directory modification times are unchanged
+  CONFIG = {'index': {'enabled': True, 'max_age_minutes': 60}}
+
+  def setUp(self):
+    super().setUp()
+    self._top = os.path.join(self._dir.name, 'top')
+    for p in ('a/b', 'a/c', 'd'):
+      os.makedirs(os.path.join(self._top, p))
+    for p in ('x.bib', 'a/y.bib', 'a/b/z.tex', 'd/w.png'):
+      open(os.path.join(self._top, p), 'w').close()
+    self._age()
+
+  def _age(self):
+    # directories that changed just now are not stored
+    t = time.time()-60
+    for root, dirs, files in os.walk(self._top):
+      for name in dirs+files:
+        os.utime(os.path.join(root, name), (t, t))
+    os.utime(self._top, (t, t))
+
+  def _walk(self, walk, *args):
+    return [(root, sorted(dirs), sorted(files))
+                for root, dirs, files in walk(self._top, *args)]
+
+  def test_walk(self):
+    from paperman import fsindex
+    expected = self._walk(os.walk)
+    self.assertEqual(self._walk(fsindex.walk), expected)
+    self.assertEqual(fsindex.status(self._top)[:2], (5, 4))
+    self.assertEqual(self._walk(fsindex.walk), expected)
+    self.assertEqual(self._walk(fsindex.walk, True), expected)
+
+  def test_refresh(self):
+    # new files are only seen after a refresh or once max_age_minutes
+    # passed, only changed directories are listed again
+    from paperman import fsindex, walker
+    self._walk(fsindex.walk)
+    open(os.path.join(self._top, 'a', 'new.bib'), 'w').close()
+    os.utime(os.path.join(self._top, 'a'), (time.time(),)*2)
+    self.assertNotIn('new.bib', self._walk(fsindex.walk)[1][2])
+    with mock.patch.object(walker, 'listdir', wraps=walker.listdir) as m:
+      self.assertIn('new.bib', self._walk(fsindex.walk, True)[1][2])
+    self.assertEqual([c.args[0] for c in m.call_args_list],
+                     [os.path.join(self._top, 'a')])
+    self.assertEqual(self._walk(fsindex.walk, True), self._walk(os.walk))
+
+  def test_mtime(self):
+    # a changed directory is listed again, even with the same number of
+    # entries
+    from paperman import fsindex
+    self._walk(fsindex.walk)
+    os.rename(os.path.join(self._top, 'd', 'w.png'),
+              os.path.join(self._top, 'd', 'v.png'))
+    self._age()
+    t = time.time()-30
+    os.utime(os.path.join(self._top, 'd'), (t, t))
+    self.assertEqual(self._walk(fsindex.walk, True), self._walk(os.walk))
+    self.assertEqual(self._walk(fsindex.walk), self._walk(os.walk))
+
+  def test_recent(self):
+    # directories modified within the last seconds are listed every time
+    from paperman import fsindex
+    os.utime(os.path.join(self._top, 'd'))
+    self._walk(fsindex.walk)
+    self.assertEqual(fsindex.status(self._top)[:2], (4, 3))
+
+  def test_incomplete(self):
+    # aborted walks store listings but do not mark top as refreshed
+    from paperman import fsindex
+    for root, dirs, files in fsindex.walk(self._top):
+      break
+    self.assertIsNone(fsindex.status(self._top)[2])
+    self._walk(fsindex.walk)
+    self.assertIsNotNone(fsindex.status(self._top)[2])
+
+  def test_clear(self):
+    from paperman import fsindex
+    self._walk(fsindex.walk)
+    fsindex.clear(os.path.join(self._top, 'a'))
+    self.assertEqual(fsindex.status(self._top)[:2], (2, 2))
+    fsindex.clear(self._top)
+    self.assertEqual(fsindex.status(self._top), (0, 0, None))
+
+  def test_disabled(self):
+    from paperman import fsindex
+    self._setConfig({'index': {'enabled': False}})
+    self.assertEqual(self._walk(fsindex.walk), self._walk(os.walk))
+    self.assertFalse(os.path.exists(fsindex._path()))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import tempfile
+import json
+import os
+import sys
+from io import StringIO
+
+# capture all content printed to stdout
+class CaptureStdout(list):
+  def __enter__(self):
+    self._stdout = sys.stdout
+    sys.stdout = StringIO()
+    return self
+  def __exit__(self, *args):
+    self.extend(sys.stdout.getvalue().splitlines())
+    sys.stdout = self._stdout
+
+class IsolatedTestCase(unittest.TestCase):
+  # runs each test with a config file and cache directory of its own in the
+  # temporary directory self._dir, CONFIG is written to the config file, the
+  # user config and cache are never touched
+  CONFIG = {}
+
+  def setUp(self):
+    from paperman import cfg, cache
+    self._dir = tempfile.TemporaryDirectory()
+    self.addCleanup(self._dir.cleanup)
+    self.addCleanup(self._restore, cfg._CFG_PATH, cache._CACHE_DIR)
+    cfg._CFG_PATH = os.path.join(self._dir.name, 'paperman.conf')
+    cache._CACHE_DIR = os.path.join(self._dir.name, 'cache')
+    self._setConfig(self.CONFIG)
+    # databases are opened again in the cache directory of the test
+    self._closeDatabases()
+    self.addCleanup(self._closeDatabases)
+
+  def _restore(self, cfgPath, cacheDir):
+    from paperman import cfg, cache
+    cfg._CFG_PATH, cache._CACHE_DIR = cfgPath, cacheDir
+    # the user config is loaded again when needed, restoring the loaded test
+    # config would write it to the user config file
+    cfg._IS_CFG_LOADED = False
+
+  def _closeDatabases(self):
+    from paperman import fsindex, citeindex
+    for m in (fsindex, citeindex):
+      if m._db is not None:
+        m._db.close()
+      m._db = None
+
+  def _setConfig(self, config):
+    from paperman import cfg
+    # json is valid yaml
+    with open(cfg._CFG_PATH, 'w') as f:
+      json.dump(config, f)
+    cfg._IS_CFG_LOADED = False
+
+  def _chdir(self, path):
+    self.addCleanup(os.chdir, os.getcwd())
+    os.chdir(path)
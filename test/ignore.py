@@ -0,0 +1,46 @@
+import unittest
+
+
+class TestIgnore(unittest.TestCase):
+  def _isIgnored(self, patterns, path, isDir=False):
+    from paperman.ignore import IgnoreRules, _compile
+    rules = IgnoreRules([('base', r) for r in map(_compile, patterns)
+                                       if r is not None])
+    root, _, name = ('base/'+path).rpartition('/')
+    return rules.isIgnored(root, name, isDir)
+
+  def test_names(self):
+    self.assertTrue(self._isIgnored(['*.log'], 'a/b/x.log'))
+    self.assertFalse(self._isIgnored(['*.log'], 'a/b/x.tex'))
+    self.assertTrue(self._isIgnored(['build/'], 'a/build', isDir=True))
+    self.assertFalse(self._isIgnored(['build/'], 'a/build'))
+    self.assertTrue(self._isIgnored(['fig[0-9].pdf'], 'fig3.pdf'))
+    self.assertFalse(self._isIgnored(['fig[!0-9].pdf'], 'fig3.pdf'))
+    self.assertFalse(self._isIgnored(['# comment', ''], 'comment'))
+
+  def test_anchored(self):
+    self.assertTrue(self._isIgnored(['/tmp'], 'tmp'))
+    self.assertFalse(self._isIgnored(['/tmp'], 'a/tmp'))
+    self.assertTrue(self._isIgnored(['a/*.tex'], 'a/x.tex'))
+    self.assertFalse(self._isIgnored(['a/*.tex'], 'a/b/x.tex'))
+    self.assertFalse(self._isIgnored(['a/?/x'], 'a/b/c/x'))
+    self.assertFalse(self._isIgnored(['a?b/x'], 'a/b/x'))
+    self.assertTrue(self._isIgnored(['a?b/x'], 'a_b/x'))
+
+  def test_double_asterisk(self):
+    self.assertTrue(self._isIgnored(['**/build'], 'build'))
+    self.assertTrue(self._isIgnored(['**/build'], 'a/b/build'))
+    self.assertTrue(self._isIgnored(['docs/**/tmp'], 'docs/tmp'))
+    self.assertTrue(self._isIgnored(['docs/**/tmp'], 'docs/a/b/tmp'))
+    self.assertFalse(self._isIgnored(['docs/**/tmp'], 'other/docs/tmp'))
+    self.assertTrue(self._isIgnored(['docs/**'], 'docs/a/b.tex'))
+    self.assertFalse(self._isIgnored(['docs/a**b'], 'docs/a/b'))
+
+  def test_negation(self):
+    patterns = ['*.pdf', '!keep.pdf']
+    self.assertTrue(self._isIgnored(patterns, 'x.pdf'))
+    self.assertFalse(self._isIgnored(patterns, 'keep.pdf'))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import os
+from unittest import mock
+
+from helpers import IsolatedTestCase
+
+class TestImgListing(IsolatedTestCase):
+  # images are resolved from directory listings that are read once per
+  # process, unless they are forgotten after files were added or removed
+  def setUp(self):
+    from paperman.parser import img
+    super().setUp()
+    img._listings.clear()
+    self.addCleanup(img._listings.clear)
+    self._chdir(self._dir.name)
+    for f in ('img/a.png', 'img/b.pdf', 'img/b.v2.png', 'img/sub/a.jpg',
+              'other/c.png', 'd.png'):
+      os.makedirs(os.path.dirname(f) or '.', exist_ok=True)
+      open(f, 'w').close()
+
+  def _path(self, fname, paths=('img', 'other')):
+    from paperman.parser import ImgFile
+    return ImgFile(fname, paths=list(paths)).path
+
+  def test_resolve(self):
+    self.assertEqual(self._path('a'), 'img/a.png')
+    self.assertEqual(self._path('a.pdf'), 'img/a.png')
+    self.assertEqual(self._path('b'), 'img/b.pdf')
+    self.assertEqual(self._path('c'), 'other/c.png')
+    self.assertEqual(self._path('sub/a'), 'img/sub/a.jpg')
+    self.assertEqual(self._path('d'), './d.png')
+    self.assertIsNone(self._path('e'))
+    self.assertIsNone(self._path('missing/a'))
+
+  def test_cached(self):
+    # each directory is listed once
+    from paperman import walker
+    with mock.patch.object(walker, 'listdir', wraps=walker.listdir) as m:
+      for fname in ('a', 'b', 'c', 'a', 'sub/a', 'e', 'e'):
+        self._path(fname)
+    self.assertEqual(sorted([c.args[0] for c in m.call_args_list]),
+                     ['./', 'img/', 'img/sub', 'other/'])
+
+  def test_forget(self):
+    from paperman.parser import img
+    self.assertIsNone(self._path('e'))
+    open('img/e.png', 'w').close()
+    self.assertIsNone(self._path('e'))
+    img.forgetListing('img')
+    self.assertEqual(self._path('e'), 'img/e.png')
+    os.remove('img/a.png')
+    img.forgetListing(os.path.abspath('img'))
+    self.assertIsNone(self._path('a', paths=['img']))
+
+  def test_remember(self):
+    # listings of a walk are used instead of listing directories again, but
+    # do not replace listings that are already known
+    from paperman import walker
+    from paperman.parser import img
+    img.rememberListing('img', ['x.png', 'a.png'])
+    img.rememberListing('other', ['c.png'])
+    self._path('c')
+    img.rememberListing('other', [])
+    with mock.patch.object(walker, 'listdir') as m:
+      self.assertEqual(self._path('x'), 'img/x.png')
+      self.assertEqual(self._path('c'), 'other/c.png')
+    m.assert_not_called()
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import sys
+from unittest import mock
+
+from helpers import CaptureStdout, IsolatedTestCase
+
+class TestImportAll(IsolatedTestCase):
+  # import-all imports inputs, images and citations of one shared project
+  def setUp(self):
+    from paperman import finder
+    super().setUp()
+    search = os.path.join(self._dir.name, 'search')
+    self._setConfig({'input_search_paths': [search+'/**'],
+                     'img_search_paths': [search],
+                     'bib_search_paths': [search+'/**'],
+                     'library_path': ''})
+    finder._INDICES.clear()
+    finder._REFRESHED.clear()
+    finder._STATS.clear()
+
+    self._write('project/main.tex', '\n'.join([
+      r'\documentclass{article}',
+      r'\graphicspath{{img/}}',
+      r'\begin{document}',
+      r'\input{chap}',
+      r'\includegraphics{fig1}',
+      r'\cite{key1}',
+      r'\bibliography{refs}',
+      r'\end{document}'])+'\n')
+    self._write('project/img/old.png', '')
+    self._write('project/refs.bib', '')
+    # the imported chapter includes an image that has to be imported too,
+    # graphicspaths are not inherited from the including file
+    self._write('search/chapters/chap.tex', r'\graphicspath{{img/}}'+'\n'
+                                            r'\includegraphics{fig2}'+'\n')
+    self._write('search/a/img/fig1.png', '')
+    self._write('search/b/img/fig2.png', '')
+    self._write('search/bibs/lib.bib', '@article{key1, title={One}}\n\n'
+                                       '@article{key2, title={Two}}\n')
+    self._chdir(os.path.join(self._dir.name, 'project'))
+
+  def _write(self, path, content):
+    path = os.path.join(self._dir.name, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+      f.write(content)
+
+  def _call(self, *args):
+    import paperman.__main__
+    sys.argv = ['paperman', *args]
+    with CaptureStdout() as res:
+      paperman.__main__.main()
+    return res
+
+  def test_import_all(self):
+    from paperman import project, walker
+    walk = walker.walk
+    with mock.patch.object(project, 'Project', wraps=project.Project) as p, \
+         mock.patch.object(walker, 'walk', wraps=walk) as w:
+      res = self._call('import-all')
+    self.assertEqual(p.call_count, 1)
+    projectWalks = [c for c in w.call_args_list
+                      if os.path.realpath(c.args[0]) == os.path.realpath('.')]
+    self.assertEqual(len(projectWalks), 1)
+
+    self.assertEqual(sorted(os.listdir('img')),
+                     ['fig1.png', 'fig2.png', 'old.png'])
+    self.assertTrue(os.path.exists('chap.tex'))
+    with open('refs.bib') as f:
+      refs = f.read()
+    self.assertIn('key1', refs)
+    self.assertNotIn('key2', refs)
+
+    # nothing left to import
+    res = self._call('import-all')
+    self.assertIn(r'all files imported by \input{} exist', res)
+    self.assertIn('no missing images, nothing to import', res)
+    self.assertIn('no missing citations, nothing to import', res)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -2,19 +2,30 @@ import unittest
 import subprocess
 import os
 import sys
-from io import StringIO
-
-# capture all content printed to stdout
-class CaptureStdout(list):
-  def __enter__(self):
-    self._stdout = sys.stdout
-    sys.stdout = StringIO()
-    return self
-  def __exit__(self, *args):
-    self.extend(sys.stdout.getvalue().splitlines())
-    sys.stdout = self._stdout
-
-class TestMain(unittest.TestCase):
+import tempfile
+
+from helpers import CaptureStdout, IsolatedTestCase
+
+_WRITING_CONVENTIONS = '''correct | wrong
+nanomechanical | nano mechanical, nano-mechanical
+
+# bad words
+* standard: meaningless filler
+'''
+
+class TestMain(IsolatedTestCase):
+  def setUp(self):
+    from paperman.parser import tex
+    super().setUp()
+    path = os.path.join(self._dir.name, 'writing-conventions.md')
+    with open(path, 'w') as f:
+      f.write(_WRITING_CONVENTIONS)
+    self._setConfig({'lint': {'avoid_commands_in_toplevel': ['ref'],
+                              'writing_conventions_path': path}})
+    # writing conventions are parsed once per process
+    tex._parseWritingConventions.cache_clear()
+    self.addCleanup(tex._parseWritingConventions.cache_clear)
+
   def _call(self, sub, *args):
     import paperman.__main__
     sys.argv = ['paperman', sub, *args]
@@ -34,5 +45,81 @@ class TestMain(unittest.TestCase):
     self.assertIn(r"label 'fig:thefigure' is never used in a \ref command", res)
     self.assertIn(r"found figure environment without \label", res)
 
+  def test_rule_set(self):
+    from paperman.parser.tex import _RuleSet
+    rules = _RuleSet([('foo', r'\bfoo\b', True, 'word foo'),
+                      ('\\it', r'\\it', False, 'command it'),
+                      (None, r'ba+r', False, 'regex bar'),
+                      ('o f', 'o f', False, 'substring')])
+    self.assertEqual(rules.matches('foo, \\item baaar'), [0, 1, 2])
+    self.assertEqual(rules.matches('food foo_ afoo'), [])
+    self.assertEqual(rules.matches('two foo'), [0, 3])
+
+  def test_extract(self):
+    from paperman.parser.tex import _extract
+    content = '\n'.join([r'\item[\cite{knuth}] text',
+                          r'\caption[Short \cite{lamport}]{Long}',
+                          r'\section[\ref{sec:x}]{T}',
+                          r'\cite[see \ref{sec:y}]{key}',
+                          r'\label[opt]{sec:z}'])
+    res = [(c[0], c[2], c[3]) for c in _extract(content, [1, 2, 3, 4, 5])]
+    self.assertEqual(res, [('cite', 'knuth', 1),
+                           ('cite', 'lamport', 2),
+                           ('ref', 'sec:x', 3),
+                           ('cite', 'key', 4),
+                           ('ref', 'sec:y', 4),
+                           ('label', 'sec:z', 5)])
+
+  def test_labels_of_includes(self):
+    with tempfile.TemporaryDirectory() as d:
+      files = {'main.tex': '\\documentclass{article}\n\\begin{document}\n'
+                           '\\input{ch1}\n\\input{ch2}\n\\end{document}\n',
+               'ch1.tex': '\\section{A}\\label{sec:a}\n',
+               'ch2.tex': 'see \\ref{sec:a}\nand \\ref{sec:missing}\n'}
+      for name, content in files.items():
+        with open(os.path.join(d, name), 'w') as f:
+          f.write(content)
+      res = self._call('lint', os.path.join(d, 'main.tex'))
+    self.assertNotIn("no label exists for reference 'sec:a'", res)
+    self.assertNotIn("label 'sec:a' is never used", res)
+    self.assertIn("no label exists for reference 'sec:missing'", res)
+
+  def test_lint_twice(self):
+    # files linted before are skipped within one lint only
+    from paperman.parser import TexFile
+    with tempfile.TemporaryDirectory() as d:
+      with open(os.path.join(d, 'main.tex'), 'w') as f:
+        f.write('\\begin{document}\n\\input{ch}\n\\end{document}\n')
+      with open(os.path.join(d, 'ch.tex'), 'w') as f:
+        f.write('the the\n')
+      for _ in range(2):
+        res = list(TexFile(os.path.join(d, 'main.tex')).lint())
+        self.assertIn(os.path.join(d, 'ch.tex'), [r[0] for r in res])
+
+  def test_changed_lines(self):
+    from paperman.subcommands.lint import changedLines
+    git = lambda *cmd: subprocess.run(['git', '-c', 'user.name=t',
+                                       '-c', 'user.email=t@t', *cmd],
+                                      check=True, capture_output=True)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as d:
+      try:
+        os.chdir(d)
+        with open('my chap.tex', 'w') as f:
+          f.write('a\nb\nc\n')
+        git('init', '-q')
+        git('add', '.')
+        git('commit', '-q', '-m', 'init')
+        with open('my chap.tex', 'w') as f:
+          f.write('a\nB\nc\nd\n')
+        with open('new.tex', 'w') as f:
+          f.write('x\n')
+        res = changedLines('HEAD')
+      finally:
+        os.chdir(cwd)
+      self.assertEqual(res[os.path.realpath(os.path.join(d, 'my chap.tex'))],
+                       {2, 4})
+      self.assertIsNone(res[os.path.realpath(os.path.join(d, 'new.tex'))])
+
 if __name__ == '__main__':
   unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import multiprocessing
+import contextlib
+import shutil
+import glob
+import os
+import sys
+from unittest import mock
+
+from helpers import CaptureStdout, IsolatedTestCase
+
+class TestParallel(IsolatedTestCase):
+  # serial and parallel runs have to produce identical output
+  def setUp(self):
+    super().setUp()
+    self._setConfig({'library_path': os.path.join(self._dir.name, 'lib')})
+
+  def _write(self, path, content):
+    path = os.path.join(self._dir.name, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+      f.write(content)
+
+  def _call(self, *args):
+    import paperman.__main__
+    sys.argv = ['paperman', *args]
+    with CaptureStdout() as res:
+      paperman.__main__.main()
+    # drop log lines that depend on the number of processes
+    return [l for l in res if 'processes' not in l]
+
+  def _runs(self, *args):
+    # serial and parallel with empty cache, then parallel with warm cache
+    from paperman import cache
+    res = []
+    for jobs, clear in (('1', True), ('4', True), ('4', False)):
+      if clear:
+        shutil.rmtree(cache._CACHE_DIR, ignore_errors=True)
+      res.append(self._call(*args, '-j', jobs))
+    return res
+
+  def _writeProject(self):
+    self._write('proj/main.tex',
+                '\\documentclass{article}\n\\begin{document}\n'
+                +''.join([f'\\input{{ch{i}}}\n' for i in range(8)])
+                +'\\bibliography{refs}\n\\end{document}\n')
+    for i in range(8):
+      self._write(f'proj/ch{i}.tex',
+                  f'\\section{{S}}\\label{{sec:{i}}}\n'
+                  f'see \\ref{{sec:{(i+1)%9}}}\nthe the duplicate\n'
+                  '\\begin{figure}\n\\end{figure}\n')
+    self._write('proj/refs.bib', '@misc{a, title={A}}\n@misc{a, title={B}}\n')
+    return os.path.join(self._dir.name, 'proj', 'main.tex')
+
+  def test_lint(self):
+    main = self._writeProject()
+    serial, parallel, cached = self._runs('lint', main)
+    self.assertIn('found duplicate word "the"', '\n'.join(serial))
+    self.assertEqual(serial, parallel)
+    self.assertEqual(serial, cached)
+
+  @contextlib.contextmanager
+  def _spawn(self):
+    # spawned workers do not inherit the config and cache directory of the
+    # test, they must use them anyway and never touch the default ones
+    home = os.path.join(self._dir.name, 'home')
+    method = multiprocessing.get_start_method()
+    multiprocessing.set_start_method('spawn', force=True)
+    try:
+      with mock.patch.dict(os.environ, {'XDG_CONFIG_HOME': home+'/config',
+                                        'XDG_CACHE_HOME': home+'/cache'}):
+        yield
+    finally:
+      multiprocessing.set_start_method(method, force=True)
+    self.assertFalse(os.path.exists(os.path.join(home, 'config')))
+    self.assertEqual(glob.glob(os.path.join(home, '**', '*.pickle'),
+                               recursive=True), [])
+
+  def test_lint_spawn(self):
+    main = self._writeProject()
+    serial = self._call('lint', main, '-j', '1')
+    with self._spawn():
+      self.assertEqual(self._call('lint', main, '-j', '4'), serial)
+
+  def test_lib(self):
+    for i in range(12):
+      if i % 3:
+        self._write(f'lib/d{i%4}/e{i}.bib',
+                    f'@article{{key{i%5}, title={{T{i}}}, author={{A}}}}\n')
+      if i % 4:
+        self._write(f'lib/d{i%4}/e{i}.pdf', '%PDF-1.4\n')
+    self._write('lib/d1/broken.bib', '@article{key, title = {x}\n')
+    serial, parallel, cached = self._runs('lib')
+
+    # unpaired pdf and bib files are listed in walk order like os.walk does
+    lib = os.path.join(self._dir.name, 'lib')
+    walked = [os.path.relpath(os.path.join(root, f), lib)
+                  for root, _, files in os.walk(lib) for f in files]
+    lines = [l.strip(' |\\/') for l in serial]
+    i = [k for k, l in enumerate(lines) if 'unpaired files' in l][0]
+    unpaired = lines[i+1:lines.index('-', i)]
+    self.assertEqual(len(unpaired), 5)
+    self.assertEqual(unpaired, [f for f in walked if f in unpaired])
+    self.assertEqual(serial, parallel)
+    self.assertEqual(serial, cached)
+
+  def test_scan_bib_files(self):
+    from paperman.subcommands.lib import _scanBibFiles
+    paths = []
+    for i in range(20):
+      path = f'lib/e{i}.bib'
+      self._write(path, f'@misc{{key{i}, title={{Title {i}}}}}\n'
+                        if i % 7 else '@misc{broken\n')
+      paths.append(os.path.join(self._dir.name, path))
+    for search, scan in ((None, True), (['title', '1'], False)):
+      serial = _scanBibFiles(paths, search, scan, 1)
+      self.assertEqual(_scanBibFiles(paths, search, scan, 4), serial)
+      self.assertEqual([p for p, _ in serial], paths)
+    self.assertEqual(sum([r is None for _, r in serial]), 3)
+    self.assertEqual(sum([r['match'] for _, r in serial if r]), 10)
+
+  def test_lib_spawn(self):
+    from paperman import cache
+    for i in range(8):
+      self._write(f'lib/e{i}.bib', f'@misc{{key{i}, title={{T{i}}}}}\n')
+    # files that changed just now are not cached
+    for f in os.listdir(os.path.join(self._dir.name, 'lib')):
+      os.utime(os.path.join(self._dir.name, 'lib', f), (0, 0))
+    serial = self._call('lib', '-j', '1')
+    shutil.rmtree(cache._CACHE_DIR)
+    with self._spawn():
+      self.assertEqual(self._call('lib', '-j', '4'), serial)
+    # bib files were cached in the cache directory of the test by workers
+    self.assertTrue(os.listdir(os.path.join(cache._CACHE_DIR, 'bib')))
+
+
+if __name__ == '__main__':
+  unittest.main()
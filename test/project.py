@@ -0,0 +1,106 @@
+import unittest
+import argparse
+import os
+
+from helpers import CaptureStdout, IsolatedTestCase
+
+def _unique(items):
+  # deduplication by list scans, which sets and dicts have to match
+  res = []
+  for i in items:
+    if i not in res:
+      res.append(i)
+  return res
+
+class TestProject(IsolatedTestCase):
+  # items found in several files are reported once, in first-seen or sorted
+  # order
+  def setUp(self):
+    from paperman.parser import tex, img
+    super().setUp()
+    for state in (tex._sources, img._listings):
+      state.clear()
+      self.addCleanup(state.clear)
+    self._chdir(self._dir.name)
+
+  def _write(self, path, content=''):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+      f.write(content)
+
+  def _project(self):
+    from paperman import project
+    return project.Project(argparse.Namespace(tex_file=None))
+
+  def test_img_hash(self):
+    # images that are equal have equal hashes, whether their paths are
+    # resolved or not
+    from paperman.parser import ImgFile
+    for f in ('img/a.png', 'img/a.pdf', 'img/b.png', 'img/sub/a.png'):
+      self._write(f)
+    imgs = [ImgFile('a', paths=['img']), ImgFile('a.pdf', paths=['img']),
+            ImgFile('b', paths=['img']), ImgFile('sub/a', paths=['img']),
+            ImgFile('img/a.png'), ImgFile('img/b.png'),
+            ImgFile('./img/sub/a.png'), ImgFile('c', paths=['img']),
+            ImgFile('other/c.png'), ImgFile('c.png')]
+    for i in imgs:
+      for j in imgs:
+        if i == j:
+          self.assertEqual(hash(i), hash(j), (i, j))
+    self.assertEqual(list(dict.fromkeys(imgs)), _unique(imgs))
+    self.assertEqual([i for i in imgs if i in set(imgs[:5])],
+                     [i for i in imgs if i in imgs[:5]])
+
+  def test_tex_hash(self):
+    from paperman.parser import TexFile
+    self._write('main.tex')
+    files = [TexFile('main.tex'), TexFile('./main.tex'), TexFile('main.tex')]
+    self.assertEqual(len(set(files)), 1)
+    self.assertEqual(list(dict.fromkeys(files)), _unique(files))
+
+  def test_dedup(self):
+    for f in ('img/fig1.png', 'img/fig2.png', 'img/fig3.png',
+              'img/unused2.png', 'img/unused1.png'):
+      self._write(f)
+    self._write('main.tex', '\n'.join([
+      r'\documentclass{article}',
+      r'\graphicspath{{img/}}',
+      r'\begin{document}',
+      r'\input{ch}',
+      r'\section{A}\label{sec:b}\label{sec:a}',
+      r'\ref{sec:b} \ref{sec:a}',
+      r'\includegraphics{fig2}',
+      r'\includegraphics{fig1.png}',
+      r'\includegraphics{fig2.png}',
+      r'\includegraphics{missing}',
+      r'\end{document}'])+'\n')
+    self._write('ch.tex', '\n'.join([
+      r'\graphicspath{{img/}}',
+      r'\label{sec:b}',
+      r'\ref{sec:c}',
+      r'\includegraphics{fig3}',
+      r'\includegraphics{fig1}'])+'\n')
+
+    with CaptureStdout() as out:
+      proj = self._project()
+      names = lambda items: [os.path.basename(i.path or i.fname)
+                                for i in items]
+      self.assertEqual(names(proj.toplevel()[0].imgs()),
+                       ['fig3.png', 'fig1.png', 'fig2.png', 'missing'])
+      self.assertEqual(names(proj.allIncludedImgs()),
+                       ['fig1.png', 'fig2.png', 'fig3.png', 'missing'])
+      self.assertEqual(names(proj.missingIncludedImgs()), ['missing'])
+      self.assertEqual(names(proj.unusedIncludedImgs()),
+                       ['unused1.png', 'unused2.png'])
+      self.assertEqual(names(proj.allImgFiles()),
+                       ['fig1.png', 'fig2.png', 'fig3.png', 'unused1.png',
+                        'unused2.png'])
+      self.assertEqual(proj.allLabels(), ['sec:a', 'sec:b'])
+      self.assertEqual(proj.allRefs(), ['sec:a', 'sec:b'])
+      self.assertEqual(proj.toplevel()[0].labels(), ['sec:b', 'sec:a'])
+      self.assertEqual(proj.toplevel()[0].includes()[0].refs(), ['sec:c'])
+    self.assertEqual(len([l for l in out if 'duplicate' in l]), 0)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -3,6 +3,8 @@ import subprocess
 import os
 import sys
 
+from helpers import IsolatedTestCase
+
 # context that redirects stdout to /dev/null
 class MuteStdout():
   def __enter__(self):
@@ -15,7 +17,7 @@ class MuteStdout():
     sys.stdout = self.stdout
 
 
-class TestSubcommands(unittest.TestCase):
+class TestSubcommands(IsolatedTestCase):
   def _call(self, sub, *args):
     import paperman.__main__
     sys.argv = ['paperman', sub, *args]
@@ -0,0 +1,158 @@
+import unittest
+import time
+import os
+from unittest import mock
+
+from helpers import IsolatedTestCase
+
+# lines without the word document, 20 kB of them do not fit in the probes
+_FILLER = 'Some text of the paper.\n'*1000
+
+class TexTestCase(IsolatedTestCase):
+  CONFIG = {'cache': {'enabled': True}}
+
+  def setUp(self):
+    from paperman.parser import tex
+    super().setUp()
+    tex._sources.clear()
+    self.addCleanup(tex._sources.clear)
+
+  def _write(self, content, age=60, mtime=None, name='main.tex'):
+    # files that changed just now are not cached
+    path = os.path.join(self._dir.name, name)
+    with open(path, 'w') as f:
+      f.write(content)
+    t = time.time()-age if mtime is None else mtime
+    os.utime(path, (t, t))
+    return path
+
+class TestToplevel(TexTestCase):
+  # files are only parsed entirely if "document" occurs in their first or last
+  # few kB, verdicts are cached while files are unchanged
+  def _isToplevel(self, path):
+    from paperman.parser import TexFile
+    return TexFile(path).isToplevel()
+
+  def test_small(self):
+    body = '\\begin{document}\nText\n\\end{document}\n'
+    self.assertTrue(self._isToplevel(self._write(body)))
+    self.assertTrue(self._isToplevel(self._write(
+        '\\documentclass{article}\n'+body)))
+    self.assertFalse(self._isToplevel(self._write(
+        'This document is not a toplevel file.\n')))
+    self.assertFalse(self._isToplevel(self._write(
+        '% \\begin{document}\n\\end{document}\n')))
+
+  def test_begin_outside_probe(self):
+    # \begin{document} is far from both ends, \documentclass is at the start
+    # or \end{document} at the end
+    from paperman.parser import tex
+    body = _FILLER+'\\begin{document}\n'+_FILLER
+    path = self._write('\\documentclass{article}\n'+body
+                       +'\\end{document}\n'+_FILLER)
+    with open(path, 'rb') as f:
+      self.assertNotIn(b'begin{document}', f.read(tex._PROBE_SIZE))
+    self.assertTrue(self._isToplevel(path))
+    self.assertTrue(self._isToplevel(self._write(body+'\\end{document}\n')))
+    self.assertTrue(self._isToplevel(self._write(body+'\\end{document}\n'
+                                                 +'x'*(tex._PROBE_SIZE-20))))
+
+  def test_document_in_middle(self):
+    # documented limitation: a document environment far from both ends of
+    # a file without \documentclass is not found
+    self.assertFalse(self._isToplevel(self._write(
+        _FILLER+'\\begin{document}\n\\end{document}\n'+_FILLER)))
+
+  def test_probe_rejects(self):
+    # files without "document" near their ends are not parsed at all
+    from paperman.parser import tex
+    path = self._write(_FILLER+'document\n'+_FILLER)
+    with mock.patch.object(tex._Source, '_parseDocument') as m:
+      self.assertFalse(self._isToplevel(path))
+    m.assert_not_called()
+
+  def test_cache(self):
+    from paperman.parser import tex
+    body = '\\begin{document}\nText\n\\end{document}\n'
+    path = self._write(body)
+    self.assertTrue(self._isToplevel(path))
+
+    # cached verdict is used for the unchanged file
+    tex._sources.clear()
+    with mock.patch.object(tex, '_mightContainDocument') as m:
+      self.assertTrue(self._isToplevel(path))
+    m.assert_not_called()
+
+    # same size but different modification time
+    self._write(body.replace('begin', 'BEGIN'), age=30)
+    self.assertFalse(self._isToplevel(path))
+
+    # same modification time but different size
+    t = time.time()-20
+    self._write(body, mtime=t)
+    self.assertTrue(self._isToplevel(path))
+    self._write(body.replace('begin', 'BEGIN')+'\n', mtime=t)
+    self.assertFalse(self._isToplevel(path))
+
+  def test_recent(self):
+    # verdicts of files that changed just now are not cached
+    from paperman import cache
+    path = self._write('\\begin{document}\n\\end{document}\n', age=0)
+    self.assertTrue(self._isToplevel(path))
+    self.assertFalse(os.path.exists(os.path.join(cache._CACHE_DIR,
+                                                 'toplevel')))
+
+class TestSource(TexTestCase):
+  # instances of the same file share content and analysis until the file
+  # changes
+  def test_shared(self):
+    from paperman.parser import TexFile
+    path = self._write('\\label{a}\n')
+    os.symlink(path, os.path.join(self._dir.name, 'link.tex'))
+    a = TexFile(path)
+    for b in (TexFile(path), TexFile(os.path.join(self._dir.name, '.',
+                                                  'main.tex')),
+              TexFile(os.path.join(self._dir.name, 'link.tex'))):
+      self.assertIs(a.source(), b.source())
+    self.assertEqual(a.labels(), ['a'])
+
+  def test_changed(self):
+    from paperman.parser import TexFile
+    path = self._write('\\label{a}\n')
+    a = TexFile(path)
+    self.assertEqual(a.content(), '\\label{a}')
+
+    # same size, other modification time
+    self._write('\\label{b}\n', age=30)
+    b = TexFile(path)
+    self.assertIsNot(a.source(), b.source())
+    self.assertEqual(b.content(), '\\label{b}')
+    self.assertEqual(b.labels(), ['b'])
+
+    # same modification time, other size, uncached as changed just now
+    t = time.time()
+    self._write('\\label{b}\n', mtime=t)
+    c = TexFile(path)
+    self.assertEqual(c.labels(), ['b'])
+    self._write('\\label{c}\n\\label{d}\n', mtime=t)
+    d = TexFile(path)
+    self.assertIsNot(c.source(), d.source())
+    self.assertEqual(d.labels(), ['c', 'd'])
+
+    # instances keep the content they have read
+    self.assertEqual(a.content(), '\\label{a}')
+
+  def test_includes(self):
+    # new projects see changes of included files
+    from paperman.parser import TexFile
+    main = self._write('\\begin{document}\n\\input{ch}\n\\end{document}\n')
+    self._write('\\label{a}\n', name='ch.tex')
+    self.assertEqual(TexFile(main).includes()[0].labels(), ['a'])
+    self._write('\\label{a}\\label{b}\n', name='ch.tex')
+    include, = TexFile(main).includes()
+    self.assertEqual(include.labels(), ['a', 'b'])
+    self.assertEqual(include.toplevel.path, main)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import os
+
+from helpers import IsolatedTestCase
+
+class TestWalker(IsolatedTestCase):
+  # the threaded walker has to behave like os.walk(top, topdown=True)
+  def setUp(self):
+    super().setUp()
+    self._top = os.path.join(self._dir.name, 'top')
+    for d in ('a/b/c/d/e', 'a/f', 'g', '.hidden/h', 'i/j', 'i/k/l'):
+      os.makedirs(os.path.join(self._top, d))
+    for i, d in enumerate(('', 'a', 'a/b/c', 'a/f', '.hidden/h', 'i/k/l')):
+      open(os.path.join(self._top, d, f'file{i}.txt'), 'w').close()
+    os.symlink(os.path.join(self._top, 'a'), os.path.join(self._top, 'link'))
+    os.symlink('missing', os.path.join(self._top, 'dangling'))
+
+  def _setThreads(self, threads):
+    self._setConfig({'walk_threads': threads})
+
+  def _walk(self, walk, prune=()):
+    res = []
+    for root, dirs, files in walk(self._top):
+      dirs[:] = [d for d in dirs if d not in prune]
+      res.append((root, sorted(dirs), sorted(files)))
+    return res
+
+  def test_walk(self):
+    from paperman import walker
+    for threads in (1, 8):
+      self._setThreads(threads)
+      self.assertEqual(self._walk(walker.walk), self._walk(os.walk))
+
+  def test_order(self):
+    # order depends on the order of directory entries, which has to be the
+    # same as the one of os.walk
+    from paperman import walker
+    for threads in (1, 8):
+      self._setThreads(threads)
+      self.assertEqual([r for r, _, _ in walker.walk(self._top)],
+                       [r for r, _, _ in os.walk(self._top)])
+
+  def test_prune(self):
+    from paperman import walker
+    for threads in (1, 8):
+      self._setThreads(threads)
+      res = self._walk(walker.walk, prune=('b', '.hidden', 'k'))
+      self.assertEqual(res, self._walk(os.walk, prune=('b', '.hidden', 'k')))
+      roots = [os.path.relpath(r, self._top) for r, _, _ in res]
+      self.assertEqual(sorted(roots), ['.', 'a', 'a/f', 'g', 'i', 'i/j'])
+
+  def test_links(self):
+    # links to directories are reported but not followed
+    from paperman import walker
+    for threads in (1, 8):
+      self._setThreads(threads)
+      res = self._walk(walker.walk)
+      self.assertIn('link', res[0][1])
+      self.assertIn('dangling', res[0][2])
+      self.assertNotIn(os.path.join(self._top, 'link'), [r for r, _, _ in res])
+
+  def test_unreadable(self):
+    # directories that cannot be listed are skipped
+    from paperman import walker
+    def listdir(path):
+      if os.path.basename(path) == 'a':
+        raise PermissionError(path)
+      return walker.listdir(path)
+    for threads in (1, 8):
+      self._setThreads(threads)
+      roots = [os.path.relpath(r, self._top)
+                  for r, _, _ in walker.walk(self._top, listdir=listdir)]
+      self.assertNotIn('a', roots)
+      self.assertNotIn('a/f', roots)
+      self.assertIn('i/k/l', roots)
+      self.assertEqual(list(walker.walk(os.path.join(self._top, 'missing'))),
+                       [])
+
+
+if __name__ == '__main__':
+  unittest.main()